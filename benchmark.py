@@ -0,0 +1,219 @@
+import argparse
+import json
+import platform
+import sys
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from statistics import median
+from timeit import Timer
+import numpy as np
+from data import commodities, synthetic_menu
+from individual import Individual
+from population import Population
+from fitness import get_fitness, get_fitness_batch
+from profiling import Profiler
+from selection import roulette, ranked, tournament, batch_selection
+from variation import crossover, mutation, crossover_points, mutation_types
+
+
+def measure(function, repeat=5):
+    """This function measures the time of one call of function. The number of calls per measurement is chosen
+    like in timeit (at least 0.2 seconds), and the best of repeat measurements is reported.
+
+    Args:
+        function (function): Function without arguments.
+        repeat (int, optional): Number of measurements. Defaults to 5.
+
+    Returns:
+        dict: Seconds per call (best and median) and calls per second
+    """
+    timer = Timer(function)
+    number, _ = timer.autorange()
+    times = [seconds / number for seconds in timer.repeat(repeat, number)]
+    return {"seconds": min(times), "median": median(times), "calls_per_second": 1 / min(times), "calls": number}
+
+
+@contextmanager
+def fitness_patched():
+    """Monkey patches the fitness paths of fitness.py for the benchmarks and restores the previous ones afterwards."""
+    patches = Individual.get_fitness, Population.get_fitness_batch
+    Individual.get_fitness, Population.get_fitness_batch = get_fitness, get_fitness_batch
+    try:
+        yield
+    finally:
+        Individual.get_fitness, Population.get_fitness_batch = patches
+
+
+@fitness_patched()
+def micro_benchmarks(repeat=5, seed=0):
+    """This function measures the fitness function, every selection function and every crossover and mutation type
+    on the McDonald's menu.
+
+    Args:
+        repeat (int, optional): Number of measurements per benchmark. Defaults to 5.
+        seed (int, optional): Seed of the random populations. Defaults to 0.
+
+    Returns:
+        dict: Measurement of every benchmark by name
+    """
+    np.random.seed(seed)
+    kwargs = dict(sol_size=len(commodities), valid_set=[0, 1], replacement=True)
+    pop = Population(size=100, optim="min", **kwargs)
+    batch_pop = Population(size=100, optim="min", batch=True, **kwargs)
+    individual = pop[0]
+    parent1, parent2 = pop[0].representation, pop[1].representation
+
+    results = {}
+    results["fitness/get_fitness"] = measure(individual.get_fitness, repeat)
+    results["fitness/get_fitness_batch[100]"] = measure(lambda: batch_pop.get_fitness_batch(batch_pop.representations), repeat)
+    for select, kwargs in [(roulette, {}), (ranked, {}), (tournament, {"k": 5})]:
+        results[f"selection/{select.__name__}"] = measure(lambda: select(pop, **kwargs), repeat)
+        results[f"selection/{select.__name__}_batch[100]"] = measure(lambda: batch_selection[select](batch_pop, 100, **kwargs), repeat)
+    for xo_type in [*crossover_points, "uniform"]:
+        results[f"crossover/{xo_type}"] = measure(lambda: crossover(parent1, parent2, xo_type), repeat)
+    for mutation_type in mutation_types:
+        results[f"mutation/{mutation_type}"] = measure(lambda: mutation(parent1.copy(), mutation_type, bit_flips=5), repeat)
+    return results
+
+
+@fitness_patched()
+def macro_benchmarks(sizes, items, gens=10, packed=False, max_genes=2e7, seed=0, nutrients=5, density=1.0, sparse=False):
+    """This function measures Population.evolve (batch mode) for every combination of population size and menu size.
+    The McDonald's menu is used for its own size (with 5 nutrients), other menus are synthetic (see data.synthetic_menu).
+    Options that differ from the defaults are part of the benchmark names, so that only equal setups are compared with a baseline.
+
+    Args:
+        sizes (list): Population sizes.
+        items (list): Menu sizes.
+        gens (int, optional): Number of generations per benchmark. Defaults to 10.
+        packed (bool, optional): Use packed populations. Defaults to False.
+        max_genes (float, optional): Combinations with more genes (size x items) are skipped. Defaults to 2e7.
+        seed (int, optional): Seed of the menus and populations. Defaults to 0.
+        nutrients (int, optional): Number of nutrient columns of the synthetic menus. Defaults to 5.
+        density (float, optional): Share of non-zero nutrient values of the synthetic menus. Defaults to 1.0.
+        sparse (bool, optional): Evaluate with a sparse (CSR) commodity matrix of the synthetic menus. Defaults to False.
+
+    Returns:
+        dict: Seconds per generation, generations per second and evaluations per second of every combination by name
+    """
+    options = ("/packed" if packed else "") + ("/sparse" if sparse else "")
+    options += f"/nutrients={nutrients}" if nutrients != 5 else ""
+    options += f"/density={density}" if density != 1.0 else ""
+    results = {}
+    for n_items in items:
+        if n_items == len(commodities) and nutrients == 5 and not sparse:
+            menu = dict()
+        else:
+            names, matrix, constraints = synthetic_menu(n_items, nutrients, density, seed=seed, sparse=sparse)
+            menu = dict(commodity_names=names, commodities_matrix=matrix, constraints=constraints)
+        for size in sizes:
+            if size * n_items > max_genes:
+                continue
+            pop = Population(
+                size=size, optim="min", batch=True, packed=packed, rng=np.random.default_rng(seed), sol_size=n_items, valid_set=[0, 1],
+                replacement=True, **menu,
+            )
+            profiler = Profiler()
+            pop.evolve(select=tournament, tournament_k=5, crossover=crossover, mutate=mutation, gens=gens, profiler=profiler)
+            report = profiler.report()
+            results[f"evolve/size={size}/items={n_items}{options}"] = {
+                "seconds": report["seconds"] / gens,
+                "generations_per_second": report["generations_per_second"],
+                "evaluations_per_second": report["evaluations_per_second"],
+                "times": report["times"],
+            }
+    return results
+
+
+def compare(results, baseline, tolerance=0.1):
+    """This function compares the seconds of every benchmark with a stored baseline.
+
+    Args:
+        results (dict): Measurements by name (as returned by the benchmarks).
+        baseline (dict): Measurements of the baseline by name.
+        tolerance (float, optional): Relative slowdown that counts as regression (and speedup as improvement). Defaults to 0.1.
+
+    Returns:
+        dict: Baseline seconds, current seconds, ratio and status ("regression", "improvement" or "ok") of every common benchmark
+    """
+    comparison = {}
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        ratio = result["seconds"] / baseline[name]["seconds"]
+        status = "regression" if ratio > 1 + tolerance else "improvement" if ratio < 1 - tolerance else "ok"
+        comparison[name] = {"baseline": baseline[name]["seconds"], "current": result["seconds"], "ratio": ratio, "status": status}
+    return comparison
+
+
+def run(micro=True, macro=True, sizes=(50, 200, 1000), items=(len(commodities), 1000, 10000, 100000), gens=10, packed=False,
+        max_genes=2e7, repeat=5, seed=0, nutrients=5, density=1.0, sparse=False):
+    """Runs the selected benchmarks and returns the results with information about the environment (JSON serializable)."""
+    results = {}
+    if micro:
+        results.update(micro_benchmarks(repeat, seed))
+    if macro:
+        results.update(macro_benchmarks(sizes, items, gens, packed, max_genes, seed, nutrients, density, sparse))
+    return {
+        "meta": {
+            "time": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "packed": packed,
+            "sparse": sparse,
+            "nutrients": nutrients,
+            "density": density,
+            "gens": gens,
+        },
+        "results": results,
+    }
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description="Benchmarks of the fitness function, the operators and Population.evolve.")
+    parser.add_argument("--output", help="JSON file the results are written to")
+    parser.add_argument("--baseline", help="JSON file of an earlier run to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="relative slowdown that counts as regression")
+    parser.add_argument("--quick", action="store_true", help="fewer measurements, generations and menu sizes")
+    parser.add_argument("--no-micro", action="store_true", help="skip the micro benchmarks")
+    parser.add_argument("--no-macro", action="store_true", help="skip the evolve benchmarks")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 200, 1000], help="population sizes")
+    parser.add_argument("--items", type=int, nargs="+", default=[len(commodities), 1000, 10000, 100000], help="menu sizes")
+    parser.add_argument("--gens", type=int, default=10, help="generations per evolve benchmark")
+    parser.add_argument("--packed", action="store_true", help="use packed populations in the evolve benchmarks")
+    parser.add_argument("--nutrients", type=int, default=5, help="nutrient columns of the synthetic menus")
+    parser.add_argument("--density", type=float, default=1.0, help="share of non-zero nutrient values of the synthetic menus")
+    parser.add_argument("--sparse", action="store_true", help="evaluate with sparse (CSR) commodity matrices (needs scipy)")
+    parser.add_argument("--max-genes", type=float, default=2e7, help="skip evolve benchmarks with more genes (size x items)")
+    arguments = parser.parse_args(arguments)
+    if arguments.quick:
+        arguments.items = [n for n in arguments.items if n <= 10000]
+        arguments.gens = min(arguments.gens, 3)
+
+    output = run(
+        micro=not arguments.no_micro, macro=not arguments.no_macro, sizes=arguments.sizes, items=arguments.items, gens=arguments.gens,
+        packed=arguments.packed, max_genes=arguments.max_genes, repeat=2 if arguments.quick else 5,
+        nutrients=arguments.nutrients, density=arguments.density, sparse=arguments.sparse,
+    )
+    for name, result in output["results"].items():
+        print(f"{name:<48}{result['seconds'] * 1000:>12.4f} ms")
+
+    regressions = 0
+    if arguments.baseline:
+        with open(arguments.baseline) as file:
+            comparison = compare(output["results"], json.load(file)["results"], arguments.tolerance)
+        output["comparison"] = comparison
+        print(f"\n{'Benchmark':<48}{'Ratio':>8}  Status")
+        for name, entry in comparison.items():
+            print(f"{name:<48}{entry['ratio']:>8.2f}  {entry['status']}")
+        regressions = sum(entry["status"] == "regression" for entry in comparison.values())
+
+    if arguments.output:
+        with open(arguments.output, "w") as file:
+            json.dump(output, file, indent=2)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
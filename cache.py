@@ -0,0 +1,121 @@
+from collections import OrderedDict
+import hashlib
+import numpy as np
+
+
+def matrix_digest(commodities_matrix):
+    """Returns a digest of the shape and values of a commodity matrix (dense or scipy.sparse)."""
+    digest = hashlib.sha1()
+    if hasattr(commodities_matrix, "tocsr"):
+        commodities_matrix = commodities_matrix.tocsr()
+        arrays = [commodities_matrix.data, commodities_matrix.indices, commodities_matrix.indptr]
+    else:
+        arrays = [commodities_matrix]
+    digest.update(repr(commodities_matrix.shape).encode())
+    for array in arrays:
+        digest.update(np.ascontiguousarray(array, dtype=np.float64).tobytes())
+    return digest.hexdigest()
+
+
+class FitnessCache:
+    def __init__(self, maxsize=100000, constraints=None, commodities_matrix=None):
+        """Size-bounded LRU cache of fitness values, keyed on the packed bits of a binary representation
+        (other representations are keyed on their values). The same cache can be shared across generations and runs,
+        as long as they use the same constraints and commodity matrix.
+
+        Args:
+            maxsize (int, optional): Maximum number of cached representations. Defaults to 100000.
+            constraints (array_like, optional): Constraints the cached fitness values were computed with. Defaults to None.
+            commodities_matrix (np.ndarray, optional): Commodity matrix the cached fitness values were computed with. Defaults to None.
+        """
+        self.maxsize = maxsize
+        self.constraints = None if constraints is None else np.array(constraints, dtype=np.float64)
+        self.matrix_digest = None if commodities_matrix is None else matrix_digest(commodities_matrix)
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def key(self, representation):
+        """Returns the compact key of a binary representation (one bit per gene) or the value key of any other representation."""
+        representation = np.asarray(representation)
+        if np.any((representation != 0) & (representation != 1)):
+            return self.value_key(representation)
+        return np.packbits(representation != 0, axis=-1).tobytes() + len(representation).to_bytes(4, "little")
+
+    def keys(self, representations):
+        """Returns the keys of all rows of a 2-D array of representations (see key)."""
+        representations = np.asarray(representations)
+        keys = self.packed_keys(np.packbits(representations != 0, axis=-1), representations.shape[1])
+        # Rows with other values than 0 and 1 are keyed on their values
+        for i in np.flatnonzero(np.any((representations != 0) & (representations != 1), axis=1)):
+            keys[i] = self.value_key(representations[i])
+        return keys
+
+    def value_key(self, representation):
+        """Returns the key of a non-binary representation (its values as 64 bit integers, marked so that it never equals a binary key)."""
+        return b"v" + np.ascontiguousarray(representation, dtype=np.int64).tobytes()
+
+    def packed_keys(self, packed, length):
+        """Returns the keys of all rows of a 2-D array of representations that are already packed (see packed.pack)."""
+        length = length.to_bytes(4, "little")
+        return [row.tobytes() + length for row in packed]
+
+    def get(self, key):
+        """Returns the cached (fitness, costs, totals) of a key or None and updates the hit/miss counters."""
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return entry
+
+    def put(self, key, fitness, costs, totals):
+        """Stores the fitness values of a key and evicts the least recently used entries if the cache is full."""
+        self.entries[key] = (fitness, costs, totals)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def check(self, constraints, commodities_matrix=None):
+        """Raises an exception if the cache was filled with different constraints or a different commodity matrix than the passed ones."""
+        constraints = np.asarray(constraints, dtype=np.float64)
+        if self.constraints is None:
+            self.constraints = constraints.copy()
+        elif self.constraints.shape != constraints.shape or not np.array_equal(self.constraints, constraints):
+            raise Exception("The fitness cache was filled with different constraints.")
+        if commodities_matrix is None:
+            return
+        digest = matrix_digest(commodities_matrix)
+        if self.matrix_digest is None:
+            self.matrix_digest = digest
+        elif self.matrix_digest != digest:
+            raise Exception("The fitness cache was filled with a different commodity matrix.")
+
+    def clear(self):
+        """Removes all entries and resets the counters."""
+        self.entries.clear()
+        self.hits = self.misses = self.evictions = 0
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self):
+        """Returns the hit, miss and eviction counters of the cache."""
+        return {
+            "size": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hit_rate,
+        }
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __repr__(self):
+        return f"FitnessCache(size={len(self.entries)}, maxsize={self.maxsize}); Hits: {self.hits}; Misses: {self.misses}; Evictions: {self.evictions}"
@@ -1,4 +1,10 @@
-import pandas as pd
+import os
+import hashlib
+import numpy as np
+
+# Columns of the menu .csv file that are used as price and nutrient values
+menu_columns = ['Price ($)', 'Calories (kcal)', 'Total Fat (g)', 'Sodium (mg)', 'Carbohydrates (g)', 'Protein (g)']
+
 
 def transform_data():
     """This function was used to transform the data from the .csv file into a dictionary, 
@@ -7,6 +13,9 @@ def transform_data():
     Returns:
         dictionary: The keys are the names of the McDonald's menu items and the values are corresponding nutritional values.
     """
+    # pandas is only needed to read the .csv file, so it is imported here and not at module level
+    import pandas as pd
+
     # Read in the data.
     df = pd.read_csv('DataCSV/McDonaldsMenuData.csv')
     # Create an empty dictionary.
@@ -15,14 +24,117 @@ def transform_data():
     for index, row in df.iterrows():
         # Get the item name and the other columns as a list.
         item_name = row['Item']
-        item_values = [row['Price ($)'], row['Calories (kcal)'], row['Total Fat (g)'],
-                       row['Sodium (mg)'], row['Carbohydrates (g)'], row['Protein (g)']]
+        item_values = [row[column] for column in menu_columns]
         
         # Add the item and its values to the dictionary.
         d[item_name] = item_values
     return d
 
 
+def freeze(array):
+    """This function returns a read-only, C-contiguous float64 version of the passed array.
+
+    Args:
+        array (array_like): Array that should be frozen.
+
+    Returns:
+        np.ndarray: Read-only array
+    """
+    array = np.ascontiguousarray(array, dtype=np.float64)
+    array.flags.writeable = False
+    return array
+
+
+def load_menu(path, cache_dir=None, columns=None, item_column='Item', mmap=True):
+    """This function loads a (large) menu from a .csv file and returns the item names and the commodity matrix.
+    On first use the .csv file is converted into binary .npy files next to it (or in cache_dir). Later calls load the
+    cached files, memory mapped and without importing pandas, as long as the cache is newer than the .csv file.
+    Every selection of columns has its own cache files.
+
+    Args:
+        path (str): Path of the menu .csv file.
+        cache_dir (str, optional): Directory of the binary cache. Defaults to the directory of the .csv file.
+        columns (list, optional): Price column followed by the nutrient columns. Defaults to menu_columns.
+        item_column (str, optional): Column with the item names. Defaults to 'Item'.
+        mmap (bool, optional): Memory map the cached commodity matrix instead of reading it into memory. Defaults to True.
+
+    Returns:
+        np.ndarray: Item names
+        np.ndarray: Read-only commodity matrix (one row per item: price followed by the nutrient values)
+    """
+    if columns is None:
+        columns = menu_columns
+    if cache_dir is None:
+        cache_dir = os.path.dirname(os.path.abspath(path))
+    # The cache files are named after the .csv file and the selected columns
+    selection = hashlib.sha1(repr([item_column] + list(columns)).encode()).hexdigest()[:12]
+    stem = os.path.join(cache_dir, os.path.splitext(os.path.basename(path))[0] + '.' + selection)
+    matrix_path, names_path = stem + '.matrix.npy', stem + '.names.npy'
+
+    # Rebuild the cache from the .csv file if it is missing or outdated
+    outdated = lambda cache_path: not os.path.exists(cache_path) or os.path.getmtime(cache_path) < os.path.getmtime(path)
+    if outdated(matrix_path) or outdated(names_path):
+        import pandas as pd
+
+        df = pd.read_csv(path, usecols=[item_column] + list(columns))
+        os.makedirs(cache_dir, exist_ok=True)
+        np.save(names_path, df[item_column].to_numpy(dtype=str))
+        np.save(matrix_path, np.ascontiguousarray(df[list(columns)].to_numpy(dtype=np.float64)))
+
+    names = np.load(names_path)
+    matrix = np.load(matrix_path, mmap_mode='r' if mmap else None)
+    if not mmap:
+        matrix.flags.writeable = False
+    return names, matrix
+
+
+def synthetic_menu(items, nutrients=5, density=1.0, diet_size=10, seed=0, sparse=False, chunk_size=10000):
+    """This function generates a random menu of any size for scaling tests. The same arguments always give the same menu,
+    independent of sparse. Every item has a price, every nutrient value is non-zero with probability density. The
+    constraints are the expected totals of diet_size random items, so that small diets can meet them.
+
+    Args:
+        items (int): Number of items.
+        nutrients (int, optional): Number of nutrient columns. Defaults to 5.
+        density (float, optional): Share of non-zero nutrient values. Defaults to 1.0.
+        diet_size (int, optional): Number of items of an average diet that meets the constraints. Defaults to 10.
+        seed (int, optional): Seed of the menu. Defaults to 0.
+        sparse (bool, optional): Return the commodity matrix as scipy.sparse CSR array (needs scipy). Defaults to False.
+        chunk_size (int, optional): Number of items that are generated at once. Defaults to 10000.
+
+    Returns:
+        tuple: Item names
+        np.ndarray or scipy.sparse.csr_array: Commodity matrix (one row per item: price followed by the nutrient values)
+        np.ndarray: Nutrient minimum constraints
+    """
+    rng = np.random.default_rng(seed)
+    # Typical magnitude of every nutrient
+    scales = rng.lognormal(3.0, 1.5, size=nutrients)
+
+    # Generate the non-zero values in chunks of items (coordinate format)
+    rows, columns, values = [], [], []
+    for start in range(0, items, chunk_size):
+        n = min(chunk_size, items - start)
+        prices = np.round(0.5 + rng.gamma(2.0, 1.5, size=n), 2)
+        nutrition = rng.gamma(2.0, 0.5, size=(n, nutrients)) * scales
+        chunk_rows, chunk_columns = np.nonzero(rng.random((n, nutrients)) < density)
+        rows += [start + np.arange(n), start + chunk_rows]
+        columns += [np.zeros(n, dtype=np.intp), chunk_columns + 1]
+        values += [prices, nutrition[chunk_rows, chunk_columns]]
+    rows, columns, values = np.concatenate(rows), np.concatenate(columns), np.concatenate(values)
+
+    names = tuple(f'Item {i}' for i in range(items))
+    constraints = freeze(diet_size * np.bincount(columns, weights=values, minlength=nutrients + 1)[1:] / items)
+    if sparse:
+        # scipy is only needed for sparse menus, so it is imported here and not at module level
+        from scipy.sparse import coo_array
+
+        return names, coo_array((values, (rows, columns)), shape=(items, nutrients + 1)).tocsr(), constraints
+    matrix = np.zeros((items, nutrients + 1))
+    matrix[rows, columns] = values
+    return names, freeze(matrix), constraints
+
+
 ###################################################################
 # Nutrient minimum constraints
 ###################################################################
@@ -144,3 +256,16 @@ commodities = {
     'Hot Fudge Sundae': [2.83, 330, 9.0, 170, 53, 8],
     'Strawberry Sundae': [2.14, 280, 6.0, 85, 49, 6]
     }
+
+
+###################################################################
+# Precomputed arrays
+###################################################################
+"""
+    Read-only arrays of the data above, so that the consumers do not have to convert the dictionaries again.
+    commodities_matrix has one row per item (price followed by the nutrient values) in the order of commodity_names.
+"""
+
+commodity_names = tuple(commodities.keys())
+commodities_matrix = freeze(list(commodities.values()))
+nutrients_vector = freeze(list(nutrients.values()))
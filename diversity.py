@@ -0,0 +1,99 @@
+import numpy as np
+import packed as packing
+
+
+# Maximum number of genes (rows x length) that are unpacked at once to count the alleles of packed populations
+chunk_size = 2 ** 24
+
+
+def row_keys(representations):
+    """Returns one hashable key (the bytes of the row) for every row of a 2-D array of representations (packed or not)."""
+    representations = np.ascontiguousarray(representations)
+    return representations.view(np.dtype((np.void, representations.dtype.itemsize * representations.shape[1]))).ravel()
+
+
+def unique_count(representations):
+    """Returns the number of distinct rows (genomes) of a 2-D array of representations (packed or not)."""
+    return len(np.unique(row_keys(representations)))
+
+
+def duplicates(representations, existing=None):
+    """This function finds the rows that are equal to an earlier row of the array or to a row of existing, using a hash set of the row bytes.
+
+    Args:
+        representations (np.ndarray): 2-D array with the representation of one individual per row (packed or not).
+        existing (np.ndarray, optional): Representations that count as already present (same format). Defaults to None.
+
+    Returns:
+        np.ndarray: Boolean mask of the duplicated rows (the first occurrence of a genome is not a duplicate)
+    """
+    seen = set() if existing is None else set(key.tobytes() for key in row_keys(existing))
+    mask = np.zeros(len(representations), dtype=bool)
+    for i, key in enumerate(row_keys(representations)):
+        key = key.tobytes()
+        if key in seen:
+            mask[i] = True
+        else:
+            seen.add(key)
+    return mask
+
+
+def allele_counts(representations, values, packed=False, length=None):
+    """This function counts how often every value (allele) occurs at every gene.
+
+    Args:
+        representations (np.ndarray): 2-D array with the representation of one individual per row.
+        values (list): Possible values of a gene (valid_set of the population).
+        packed (bool, optional): The representations are packed (binary, see packed.py). Defaults to False.
+        length (int, optional): Number of genes of packed representations. Defaults to None.
+
+    Returns:
+        np.ndarray: Number of individuals with value v (rows, in the order of values) at gene j (columns)
+    """
+    if not packed:
+        return np.array([np.count_nonzero(representations == value, axis=0) for value in values])
+    # Packed rows are unpacked in chunks, only the number of selected items per gene is kept
+    ones = np.zeros(length, dtype=np.int64)
+    rows = max(1, chunk_size // max(length, 1))
+    for start in range(0, len(representations), rows):
+        ones += packing.unpack(representations[start:start + rows], length).sum(axis=0, dtype=np.int64)
+    counts = {1: ones, 0: len(representations) - ones}
+    return np.array([counts.get(value, np.zeros(length, dtype=np.int64)) for value in values])
+
+
+def mean_hamming(representations, values=(0, 1), packed=False, length=None, pairs=None, rng=None):
+    """This function calculates the mean Hamming distance of all pairs of individuals as fraction of the genes.
+    Without pairs the exact mean is computed from the allele counts: at a gene with value counts c, (n^2 - sum(c^2)) / 2 of the
+    n(n-1)/2 pairs differ, so no pair is compared. Otherwise the mean of randomly sampled pairs is returned (popcount of
+    the XOR of packed rows).
+
+    Args:
+        representations (np.ndarray): 2-D array with the representation of one individual per row.
+        values (list, optional): Possible values of a gene. Defaults to (0, 1).
+        packed (bool, optional): The representations are packed (binary, see packed.py). Defaults to False.
+        length (int, optional): Number of genes of packed representations. Defaults to None.
+        pairs (int, optional): Number of sampled pairs. Defaults to None (exact).
+        rng (np.random.Generator, optional): Random number generator of the sampled pairs (Population passes its own diversity_rng).
+            Defaults to None (a new generator with a fixed seed, the same pairs in every call).
+
+    Returns:
+        float: Mean fraction of genes in which two individuals differ (0 if all are equal)
+    """
+    n = len(representations)
+    length = representations.shape[1] if length is None else length
+    if n < 2 or length == 0:
+        return 0.0
+    if pairs is None:
+        counts = allele_counts(representations, values, packed, length)
+        differing = (n * n - np.sum(counts.astype(np.float64) ** 2, axis=0)) / 2
+        return float(differing.sum() / (n * (n - 1) / 2) / length)
+
+    rng = np.random.default_rng(0) if rng is None else rng
+    first = rng.choice(n, size=pairs)
+    # The second individual of a pair is never the first one
+    second = (first + 1 + rng.choice(n - 1, size=pairs)) % n
+    if packed:
+        distances = packing.popcount(representations[first] ^ representations[second])
+    else:
+        distances = np.count_nonzero(representations[first] != representations[second], axis=1)
+    return float(np.mean(distances)) / length
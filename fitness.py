@@ -1,6 +1,6 @@
 from individual import Individual
 from population import Population
-from data import nutrients, commodities
+from data import nutrients, commodities, commodities_matrix, nutrients_vector
 from selection import roulette, ranked, tournament
 from variation import crossover, mutation
 from copy import deepcopy
@@ -17,11 +17,10 @@ def get_fitness(self):
         list: total nutrion values of that individual
     """
     # Create vector of total costs and total nutrional values of the individual
-    commodities_matrix = np.array(list(commodities.values()))
     commodities_of_individual = self.representation.dot(commodities_matrix)
     
-    # Create constraints list and check which constraints are fulfilled/broken
-    constraints = np.array(list(nutrients.values()))
+    # Check which constraints are fulfilled/broken
+    constraints = nutrients_vector
     check = constraints <= commodities_of_individual[1:] # min constraints
 
     # Initial fitness based on costs
@@ -33,4 +32,120 @@ def get_fitness(self):
         if check[i] == False:
             fitness += 10 
 
-    return fitness, costs, commodities_of_individual[1:]
\ No newline at end of file
+    return fitness, costs, commodities_of_individual[1:]
+
+
+def get_fitness_delta(self, parent, changes):
+    """This function calculates the fitness value of an individual that was created by mutating a copy of an already evaluated parent.
+    Instead of a full recompute, the cached totals of the parent are updated by the commodity rows of the changed items only.
+    The function returns the same values as get_fitness.
+
+    Args:
+        parent (Individual): Evaluated individual the representation was copied from before the mutation.
+        changes (tuple): Touched indices and their previous values, as returned by mutation(..., return_changes=True).
+
+    Returns:
+        int: fitness 
+        int: total cost/price
+        list: total nutrion values of that individual
+    """
+    indices, previous = changes
+
+    # Update the total costs and total nutritional values of the parent by the changed items
+    difference = self.representation[indices] - previous
+    commodities_of_individual = np.concatenate(([parent.costs], parent.totals)) + difference.dot(commodities_matrix[indices])
+
+    # Check which constraints are fulfilled/broken
+    check = nutrients_vector <= commodities_of_individual[1:] # min constraints
+
+    # Initial fitness based on costs, increased for every broken constraint
+    costs = commodities_of_individual[0]
+    fitness = costs + 10 * np.count_nonzero(~check)
+
+    return fitness, costs, commodities_of_individual[1:]
+
+
+def get_fitness_batch(self, representations):
+    """This function calculates the fitness values of a whole generation at once. All representations are multiplied 
+    with the commodity matrix of the population in a single matrix multiplication and every broken constraint is penalized in the same way as in get_fitness.
+    The commodity matrix can be a dense array or a scipy.sparse CSR array (the cost then scales with its non-zeros, the totals are dense).
+
+    Args:
+        representations (np.ndarray): 2-D array with the representation of one individual per row.
+
+    Returns:
+        np.ndarray: fitness of every individual
+        np.ndarray: total cost/price of every individual
+        np.ndarray: total nutrition values of every individual (one row per individual)
+    """
+    # Create matrix of total costs and total nutritional values, one row per individual
+    commodities_of_individuals = representations @ self.commodities_matrix
+
+    # Check which constraints are fulfilled/broken for every individual
+    check = self.constraints <= commodities_of_individuals[:, 1:] # min constraints
+
+    # Initial fitness based on costs
+    costs = commodities_of_individuals[:, 0]
+
+    # Increase fitness by 10 for every broken constraint
+    fitness = costs + 10 * np.count_nonzero(~check, axis=1)
+
+    return fitness, costs, commodities_of_individuals[:, 1:]
+
+
+# get_fitness_batch computes the same values as get_fitness, so scalar populations may evaluate their individuals with it
+# (Population.flush only uses a batch path whose fitness attribute is the patched Individual.get_fitness)
+get_fitness_batch.fitness = get_fitness
+
+
+def get_flip_fitness(self, representations, costs, totals):
+    """This function calculates the fitness values of all single-bit flip neighbours of binary representations at once.
+    Flipping item j changes the total costs and nutrition values by plus or minus row j of the commodity matrix, 
+    so the neighbours are scored from the totals of the individuals without evaluating them. Needs a dense commodity matrix (like seeding and memetic).
+
+    Args:
+        representations (np.ndarray): 2-D array with the (binary) representation of one individual per row.
+        costs (np.ndarray): Total cost/price of every individual.
+        totals (np.ndarray): Total nutrition values of every individual (one row per individual).
+
+    Returns:
+        np.ndarray: fitness of the neighbour of every individual (rows) with every item flipped (columns)
+    """
+    # +1 if the item is added, -1 if it is removed
+    signs = 1 - 2 * representations
+
+    # Total costs and total nutritional values of every neighbour
+    flipped_costs = costs[:, None] + signs * self.commodities_matrix[:, 0]
+    flipped_totals = totals[:, None, :] + signs[:, :, None] * self.commodities_matrix[:, 1:]
+
+    # Increase fitness by 10 for every broken constraint
+    check = self.constraints <= flipped_totals # min constraints
+    return flipped_costs + 10 * np.count_nonzero(~check, axis=2)
+
+
+def get_fitness_profiles(self, representations):
+    """This function calculates the fitness values of a whole generation for several constraint profiles at once. All representations 
+    are multiplied with the commodity matrix in a single matrix multiplication, and the totals are checked against every profile 
+    (rows of self.profiles) in the same way as in get_fitness. The commodity matrix can be dense or a scipy.sparse CSR array.
+
+    Args:
+        representations (np.ndarray): 2-D array with the representation of one individual per row.
+
+    Returns:
+        np.ndarray: fitness of every individual for every profile (one row per profile)
+        np.ndarray: total cost/price of every individual
+        np.ndarray: total nutrition values of every individual (one row per individual)
+    """
+    # Create matrix of total costs and total nutritional values, one row per individual
+    commodities_of_individuals = representations @ self.commodities_matrix
+
+    # Count the broken constraints of every profile for every individual, one nutrient at a time
+    broken = np.zeros((len(self.profiles), len(representations)))
+    for j in range(self.profiles.shape[1]):
+        broken += ~(self.profiles[:, j, None] <= commodities_of_individuals[:, j + 1]) # min constraints
+
+    # Initial fitness based on costs, increased by 10 for every broken constraint
+    costs = commodities_of_individuals[:, 0]
+    fitness = costs + 10 * broken
+
+    return fitness, costs, commodities_of_individuals[:, 1:]
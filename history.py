@@ -0,0 +1,177 @@
+import os
+import struct
+import numpy as np
+
+# Size of the .npy header of streamed history files, fixed so that it can be rewritten in place
+header_size = 256
+
+# Quantiles of the fitness values that are stored with stats=True
+quantiles = [0.1, 0.25, 0.5, 0.75, 0.9]
+
+
+def history_dtype(nutrients, stats=False, diversity=False):
+    """Returns the structured dtype of one generation of a history.
+
+    Args:
+        nutrients (int): Number of nutrient values (totals) of an individual.
+        stats (bool, optional): Include the population statistics of the generation. Defaults to False.
+        diversity (bool, optional): Include the diversity of the generation (mean Hamming distance and unique genomes). Defaults to False.
+
+    Returns:
+        np.dtype: Structured dtype
+    """
+    fields = [("generation", np.int64), ("fitness", np.float64), ("costs", np.float64), ("totals", np.float64, (nutrients,))]
+    if stats:
+        fields += [("mean", np.float64), ("std", np.float64), ("quantiles", np.float64, (len(quantiles),))]
+    if diversity:
+        fields += [("hamming", np.float64), ("unique", np.int64)]
+    return np.dtype(fields)
+
+
+def write_header(file, dtype, length):
+    """Writes a .npy header of fixed size for a 1-D array of length records at the start of file."""
+    header = repr({"descr": np.lib.format.dtype_to_descr(dtype), "fortran_order": False, "shape": (length,)})
+    header = header.ljust(header_size - 10 - 1) + "\n"
+    file.seek(0)
+    file.write(b"\x93NUMPY\x01\x00" + struct.pack("<H", len(header)) + header.encode("latin1"))
+
+
+class History:
+    def __init__(self, nutrients, stats=False, path=None, chunk_size=100, diversity=False):
+        """History of the best individual (and optionally population statistics) of every generation, stored in a
+        preallocated structured array. With a path, the records are streamed to a .npy file in chunks of chunk_size
+        generations, and only the records that are not written yet are kept in memory. The file is (re)created with the
+        first chunk, so that a run that is resumed from a checkpoint continues the file of the interrupted run.
+
+        Args:
+            nutrients (int): Number of nutrient values (totals) of an individual.
+            stats (bool, optional): Store mean, standard deviation and quantiles of the fitness values of every generation. Defaults to False.
+            path (str, optional): .npy file the records are streamed to. Defaults to None (in memory only).
+            chunk_size (int, optional): Number of generations that are written at once. Defaults to 100.
+            diversity (bool, optional): Store the mean Hamming distance and the number of unique genomes of every generation. Defaults to False.
+        """
+        self.dtype = history_dtype(nutrients, stats, diversity)
+        self.stats = stats
+        self.diversity = diversity
+        self.path = path
+        self.chunk_size = chunk_size
+        self.buffer = np.zeros(chunk_size if path is not None else 0, dtype=self.dtype)
+        self.pending = 0
+        self.written = 0
+        # The file of the path belongs to this history (it is replaced by the first flush otherwise)
+        self.created = False
+
+    def reserve(self, n):
+        """Preallocates memory for n more generations (in memory histories only)."""
+        if self.path is None and self.pending + n > len(self.buffer):
+            buffer = np.zeros(self.pending + n, dtype=self.dtype)
+            buffer[:self.pending] = self.buffer[:self.pending]
+            self.buffer = buffer
+
+    def append(self, generation, fitness, costs, totals, population_fitness=None, diversity=None):
+        """Stores the record of one generation.
+
+        Args:
+            generation (int): Index of the generation.
+            fitness (float): Fitness of the best individual.
+            costs (float): Total costs of the best individual.
+            totals (np.ndarray): Total nutrition values of the best individual.
+            population_fitness (np.ndarray, optional): Fitness values of the whole population (needed with stats=True). Defaults to None.
+            diversity (dict, optional): Mean Hamming distance and unique genomes of the population (needed with diversity=True). Defaults to None.
+        """
+        if self.pending == len(self.buffer):
+            self.reserve(max(len(self.buffer), 1))
+        record = self.buffer[self.pending]
+        record["generation"], record["fitness"], record["costs"], record["totals"] = generation, fitness, costs, totals
+        if self.stats:
+            record["mean"], record["std"] = np.mean(population_fitness), np.std(population_fitness)
+            record["quantiles"] = np.quantile(population_fitness, quantiles)
+        if self.diversity:
+            record["hamming"], record["unique"] = diversity["hamming"], diversity["unique"]
+        self.pending += 1
+        if self.path is not None and self.pending == self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        """Appends the records in memory to the .npy file."""
+        if self.path is None or self.pending == 0:
+            return
+        if not self.created:
+            with open(self.path, "wb") as file:
+                write_header(file, self.dtype, 0)
+            self.created = True
+        with open(self.path, "r+b") as file:
+            file.seek(header_size + self.written * self.dtype.itemsize)
+            file.write(self.buffer[:self.pending].tobytes())
+            self.written += self.pending
+            write_header(file, self.dtype, self.written)
+            file.flush()
+            os.fsync(file.fileno())
+        self.pending = 0
+
+    def truncate(self, length):
+        """Drops all records after the first length records. Written records are cut off the .npy file in place."""
+        if length >= self.written:
+            self.pending = min(self.pending, length - self.written)
+            return
+        with open(self.path, "r+b") as file:
+            file.truncate(header_size + length * self.dtype.itemsize)
+            write_header(file, self.dtype, length)
+        self.written = length
+        self.pending = 0
+
+    def state(self):
+        """Returns the state of the history for a checkpoint: the number of written records and the records in memory
+        (a streamed history is not copied, it stays in its .npy file)."""
+        return {"written": self.written, "pending": self.buffer[:self.pending].copy()}
+
+    def restore(self, state):
+        """This function restores the history from a checkpoint state (see state). The .npy file of a streamed history
+        is truncated to the records that were written at the time of the checkpoint.
+
+        Args:
+            state (dict): State of the history as returned by state.
+        """
+        written = state["written"]
+        if written:
+            size = os.path.getsize(self.path) if self.path is not None and os.path.exists(self.path) else 0
+            if size < header_size + written * self.dtype.itemsize:
+                raise Exception(f"The history file {self.path} has fewer records than the checkpoint.")
+            # The file can hold records of generations after the checkpoint, they are cut off below
+            self.written = (size - header_size) // self.dtype.itemsize
+            self.created = True
+        self.truncate(written)
+        self.extend(state["pending"])
+
+    def extend(self, records):
+        """Stores several records at once."""
+        self.reserve(len(records))
+        for record in records:
+            self.buffer[self.pending] = record
+            self.pending += 1
+            if self.path is not None and self.pending == self.chunk_size:
+                self.flush()
+
+    @property
+    def records(self):
+        """All records (the written ones are read memory mapped from the .npy file)."""
+        if self.written == 0:
+            return self.buffer[:self.pending]
+        written = np.load(self.path, mmap_mode="r")
+        if self.pending == 0:
+            return written
+        return np.concatenate((written, self.buffer[:self.pending]))
+
+    def __getitem__(self, field):
+        return self.records[field]
+
+    def __len__(self):
+        return self.written + self.pending
+
+    def __repr__(self):
+        return f"History(gens={len(self)}, stats={self.stats}, diversity={self.diversity}, path={self.path})"
+
+
+def load_history(path):
+    """Loads a streamed history file memory mapped (e.g. after a crashed run)."""
+    return np.load(path, mmap_mode="r")
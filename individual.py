@@ -3,12 +3,21 @@ import numpy as np
 from data import commodities, nutrients
 
 class Individual:
+    # Compact instances without __dict__ (many temporary offsprings are created every generation)
+    __slots__ = ("representation", "_fitness", "_costs", "_totals", "parent", "changes", "fitness_cache")
+
     def __init__(
         self,
         representation=None,
         size=None,
         replacement=True,
         valid_set=None,
+        fitness=None,
+        costs=None,
+        totals=None,
+        parent=None,
+        changes=None,
+        fitness_cache=None,
     ):
         if representation is None:
             if replacement == True:
@@ -17,11 +26,93 @@ class Individual:
                 self.representation = np.array(sample(valid_set, size))
         else:
             self.representation = np.array(representation)
-        self.fitness, self.costs, self.totals = self.get_fitness()
+        # Fitness may already be computed in a batched evaluation, otherwise it is computed when it is first accessed
+        # (or when the population flushes all pending individuals at once, see Population.flush)
+        self._fitness, self._costs, self._totals = fitness, costs, totals
+        self.parent, self.changes, self.fitness_cache = None, None, None
+        if fitness is None:
+            self.parent, self.changes, self.fitness_cache = parent, changes, fitness_cache
+
+    # Number of fitness evaluations (full or incremental) of all individuals
+    evaluations = 0
+    # Optional incremental fitness path for mutated copies of a parent (monkey patch to enable)
+    get_fitness_delta = None
+    # Compare every incremental fitness with a full recompute
+    verify_delta = False
+
+    @property
+    def evaluated(self):
+        return self._fitness is not None
+
+    @property
+    def fitness(self):
+        if self._fitness is None:
+            self.evaluate()
+        return self._fitness
+
+    @fitness.setter
+    def fitness(self, fitness):
+        self._fitness = fitness
+
+    @property
+    def costs(self):
+        if self._fitness is None:
+            self.evaluate()
+        return self._costs
+
+    @costs.setter
+    def costs(self, costs):
+        self._costs = costs
+
+    @property
+    def totals(self):
+        if self._fitness is None:
+            self.evaluate()
+        return self._totals
+
+    @totals.setter
+    def totals(self, totals):
+        self._totals = totals
+
+    def set_fitness(self, fitness, costs, totals):
+        """Stores the computed fitness values and releases the references that were only needed for the evaluation."""
+        self._fitness, self._costs, self._totals = fitness, costs, totals
+        self.parent, self.changes, self.fitness_cache = None, None, None
+
+    def evaluate(self):
+        """This function computes the fitness of the individual: from the fitness cache, incrementally from the parent
+        (if get_fitness_delta is patched) or with a full get_fitness call.
+        """
+        # Look up representations that were already evaluated
+        fitness_cache = self.fitness_cache
+        if fitness_cache is not None:
+            key = fitness_cache.key(self.representation)
+            entry = fitness_cache.get(key)
+            if entry is not None:
+                self.set_fitness(*entry)
+                return
+
+        Individual.evaluations += 1
+        if self.parent is not None and self.get_fitness_delta is not None:
+            # Update the fitness of the parent by the mutated genes only
+            self.set_fitness(*self.get_fitness_delta(self.parent, self.changes))
+            if self.verify_delta:
+                self.check_fitness()
+        else:
+            self.set_fitness(*self.get_fitness())
+
+        if fitness_cache is not None:
+            fitness_cache.put(key, self._fitness, self._costs, self._totals)
 
     def get_fitness(self):
         raise Exception("You need to monkey patch the fitness path.")
 
+    def check_fitness(self):
+        """Raises an exception if the stored fitness values differ from a full recompute with get_fitness."""
+        fitness, costs, totals = self.get_fitness()
+        if not (np.isclose(fitness, self.fitness) and np.isclose(costs, self.costs) and np.allclose(totals, self.totals)):
+            raise Exception(f"Stored fitness {self.fitness} differs from the recomputed fitness {fitness}.")
+
     def __len__(self):
         return len(self.representation)
 
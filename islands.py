@@ -0,0 +1,193 @@
+import multiprocessing
+import pickle
+import traceback
+import numpy as np
+from fitness import get_fitness, get_fitness_batch
+from runner import RunHistory, create_population
+
+
+def ring(islands, epoch, rng):
+    """Ring topology: every island receives the emigrants of the previous island."""
+    return [[(i - 1) % islands] for i in range(islands)]
+
+
+def complete(islands, epoch, rng):
+    """Fully connected topology: every island receives the emigrants of all other islands."""
+    return [[j for j in range(islands) if j != i] for i in range(islands)]
+
+
+def random_pairs(islands, epoch, rng):
+    """Random topology: every island receives the emigrants of one other, randomly chosen island."""
+    sources = rng.permutation(islands)
+    # an island never receives its own emigrants
+    while islands > 1 and np.any(sources == np.arange(islands)):
+        sources = rng.permutation(islands)
+    return [[int(source)] for source in sources]
+
+
+topologies = {
+    "ring": ring,
+    "complete": complete,
+    "random": random_pairs,
+}
+
+
+class RemoteTraceback(Exception):
+    """Traceback of an exception in an island process (the cause of the exception that evolve_islands re-raises)."""
+    def __str__(self):
+        return self.args[0]
+
+
+def receive(connection):
+    """Receives the reply of an island and re-raises the exception of a failed island with its traceback."""
+    status, value = connection.recv()
+    if status == "error":
+        error, remote_traceback = value
+        raise error from RemoteTraceback(remote_traceback)
+    return value
+
+
+def failure(exception):
+    """Returns the exception of an island (or a plain Exception with its message if it cannot be pickled) and its traceback."""
+    remote_traceback = traceback.format_exc()
+    try:
+        pickle.dumps(exception)
+    except Exception:
+        exception = Exception(f"{type(exception).__name__}: {exception}")
+    return exception, remote_traceback
+
+
+def island(connection, population_size, evolve_parameters, seed_sequence, population_kwargs, fitness, fitness_batch):
+    """This function runs one island in a worker process. It evolves its population on request of the driver,
+    sends its best individuals as compact arrays and replaces its worst individuals by received immigrants.
+    Replies are sent as ("ok", value). After an exception the island answers every request with ("error", (exception, traceback))
+    until it is stopped, so that the driver re-raises it at its next receive.
+
+    Args:
+        connection (multiprocessing.connection.Connection): Connection to the driver.
+        population_size (int): Size of the population.
+        evolve_parameters (dict): Keyword arguments of Population.evolve (without gens).
+        seed_sequence (np.random.SeedSequence): Seed sequence of the island.
+        population_kwargs (dict): Additional keyword arguments of Population.
+        fitness (function): Fitness function that is monkey patched into Individual.
+        fitness_batch (function): Batch fitness function that is monkey patched into Population.
+    """
+    error = None
+    try:
+        pop = create_population(population_size, seed_sequence, population_kwargs, fitness, fitness_batch)
+    except Exception as exception:
+        error = failure(exception)
+    while True:
+        command, argument = connection.recv()
+        if error is not None:
+            # Requests with a reply get the exception, the others are ignored
+            if command in ("emigrate", "stop"):
+                connection.send(("error", error))
+            if command == "stop":
+                connection.close()
+                return
+            continue
+        try:
+            if command == "evolve":
+                # the products are only stored for the last evolve call
+                pop.history_products.clear()
+                pop.evolve(gens=argument, **evolve_parameters)
+            elif command == "emigrate":
+                connection.send(("ok", pop.emigrants(argument)))
+            elif command == "immigrate":
+                pop.immigrate(*argument)
+            elif command == "stop":
+                connection.send(("ok", RunHistory(pop)))
+                connection.close()
+                return
+        except Exception as exception:
+            error = failure(exception)
+            if command in ("emigrate", "stop"):
+                connection.send(("error", error))
+            if command == "stop":
+                connection.close()
+                return
+
+
+def evolve_islands(population_size, evolve_parameters, gens, islands=4, migration_interval=5, migrants=2,
+                   topology="ring", seed=None, population_kwargs=None, fitness=get_fitness, fitness_batch=get_fitness_batch):
+    """This function evolves several populations (islands) side by side in separate worker processes. Every migration_interval
+    generations the best individuals of every island are sent to its neighbours in the topology, where they replace the worst individuals.
+    Emigrants are exchanged as (packed, if binary) representation and fitness arrays, not as pickled Individual objects.
+
+    Args:
+        population_size (int): Size of every island population.
+        evolve_parameters (dict or list): Keyword arguments of Population.evolve (without gens), one dict for all islands or one per island.
+            termination is not supported, because every migration interval is a separate evolve call that starts the criteria over.
+        gens (int): Number of generations.
+        islands (int, optional): Number of islands (ignored if a list of evolve_parameters is passed). Defaults to 4.
+        migration_interval (int, optional): Number of generations between two migrations. Defaults to 5.
+        migrants (int, optional): Number of emigrants of every island per migration. Defaults to 2.
+        topology (str or function, optional): "ring", "complete", "random" or a function (islands, epoch, rng) that returns
+            the source islands of every island. Defaults to "ring".
+        seed (int, optional): Master seed of all islands. Defaults to None (random).
+        population_kwargs (dict, optional): Additional keyword arguments of Population. Defaults to None.
+        fitness (function, optional): Fitness function that is monkey patched into Individual. Defaults to get_fitness.
+        fitness_batch (function, optional): Batch fitness function that is monkey patched into Population. Defaults to get_fitness_batch.
+
+    Returns:
+        RunHistory: Merged history (best island of every generation)
+        list: RunHistory of every island
+    """
+    if isinstance(evolve_parameters, dict):
+        evolve_parameters = [evolve_parameters] * islands
+    islands = len(evolve_parameters)
+    if any(parameters.get("termination") is not None for parameters in evolve_parameters):
+        raise Exception("Termination criteria are not supported by evolve_islands, the islands evolve for gens generations.")
+    topology = topologies[topology] if isinstance(topology, str) else topology
+    migration_sequence, *seed_sequences = np.random.SeedSequence(seed).spawn(islands + 1)
+    rng = np.random.default_rng(migration_sequence)
+
+    # Start one worker process per island
+    connections, workers = [], []
+    for parameters, seed_sequence in zip(evolve_parameters, seed_sequences):
+        parameters = {key: value for key, value in parameters.items() if key != "gens"}
+        driver_end, worker_end = multiprocessing.Pipe()
+        worker = multiprocessing.Process(
+            target=island, args=(worker_end, population_size, parameters, seed_sequence, population_kwargs, fitness, fitness_batch)
+        )
+        worker.start()
+        # Only the island holds its end, so the driver gets EOF instead of blocking if the island dies
+        worker_end.close()
+        connections.append(driver_end)
+        workers.append(worker)
+
+    try:
+        done, epoch = 0, 0
+        while done < gens:
+            # Evolve all islands in parallel until the next migration
+            steps = min(migration_interval, gens - done)
+            for connection in connections:
+                connection.send(("evolve", steps))
+            done += steps
+            if done >= gens:
+                break
+
+            # Exchange the best individuals between the islands
+            for connection in connections:
+                connection.send(("emigrate", migrants))
+            emigrants = [receive(connection) for connection in connections]
+            for connection, sources in zip(connections, topology(islands, epoch, rng)):
+                if not sources:
+                    continue
+                arrays = [np.concatenate([emigrants[source][a] for source in sources]) for a in range(4)]
+                connection.send(("immigrate", arrays))
+            epoch += 1
+
+        for connection in connections:
+            connection.send(("stop", None))
+        histories = [receive(connection) for connection in connections]
+    except BaseException:
+        for worker in workers:
+            worker.terminate()
+        raise
+    finally:
+        for worker in workers:
+            worker.join()
+
+    return RunHistory.merge(histories, "min"), histories
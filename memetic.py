@@ -0,0 +1,119 @@
+import numpy as np
+import packed as packing
+
+
+# Maximum number of neighbour nutrition values (individuals x items x nutrients) that are scored at once
+chunk_size = 2 ** 20
+
+
+class LocalSearch:
+    def __init__(self, mode="best", scope="elites", elites=1, steps=None, max_evaluations=None, interval=1):
+        """Memetic bit-flip hill climbing of Population.evolve. Pass an instance as evolve(..., local_search=local_search).
+        In every step the fitness of all single-bit flip neighbours of the searched individuals is computed at once with
+        get_flip_fitness (monkey patch into Population), and every individual moves to an improving neighbour until no flip improves it.
+        Only for binary representations.
+
+        Args:
+            mode (str, optional): "best" moves to the best neighbour, "first" to the first improving neighbour in a random item order. Defaults to "best".
+            scope (str, optional): Search the best individuals ("elites") or the whole population ("all"). Defaults to "elites".
+            elites (int, optional): Number of searched individuals if scope="elites". Defaults to 1.
+            steps (int, optional): Maximum number of flips per individual and generation. Defaults to None (until no flip improves).
+            max_evaluations (int, optional): Maximum number of scored neighbours per generation. Defaults to None (unlimited).
+            interval (int, optional): Number of generations between two local searches. Defaults to 1.
+        """
+        if mode not in ["best", "first"]:
+            raise Exception(f"Unknown local search mode {mode}.")
+        if scope not in ["elites", "all"]:
+            raise Exception(f"Unknown local search scope {scope}.")
+        self.mode = mode
+        self.scope = scope
+        self.elites = elites
+        self.steps = steps
+        self.max_evaluations = max_evaluations
+        self.interval = interval
+        # Number of scored neighbours, applied flips and improved individuals of all local searches
+        self.evaluations = 0
+        self.flips = 0
+        self.improved = 0
+
+    def neighbours(self, population, representations, costs, totals):
+        """Returns the fitness of all single-bit flip neighbours, scored in chunks of rows."""
+        rows = max(1, chunk_size // (representations.shape[1] * totals.shape[1]))
+        return np.concatenate([
+            population.get_flip_fitness(representations[start:start + rows], costs[start:start + rows], totals[start:start + rows])
+            for start in range(0, len(representations), rows)
+        ])
+
+    def apply(self, population):
+        """This function improves the searched individuals of a population by bit-flip hill climbing. The improved
+        individuals are evaluated again with the fitness function of the population.
+
+        Args:
+            population (Population): Population after a generation.
+
+        Returns:
+            int: Number of improved individuals
+        """
+        rows = population.ranking()[:self.elites] if self.scope == "elites" else np.arange(len(population))
+        if population.batch:
+            representations = population.unpacked(population.representations[rows]).astype(np.int64)
+            fitness, costs, totals = population.fitness[rows].copy(), population.costs[rows].copy(), population.totals[rows].copy()
+        else:
+            individuals = [population.individuals[i] for i in rows]
+            representations = np.array([individual.representation for individual in individuals], dtype=np.int64)
+            fitness = np.array([individual.fitness for individual in individuals], dtype=float)
+            costs = np.array([individual.costs for individual in individuals], dtype=float)
+            totals = np.array([individual.totals for individual in individuals], dtype=float)
+
+        # Lower scores are better
+        sign = -1 if population.optim == "max" else 1
+        length = representations.shape[1]
+        budget = np.inf if self.max_evaluations is None else self.max_evaluations
+        active = np.ones(len(rows), dtype=bool)
+        changed = np.zeros(len(rows), dtype=bool)
+        step = 0
+        while active.any() and (self.steps is None or step < self.steps):
+            # Only as many individuals as the remaining budget allows are searched
+            searched = np.flatnonzero(active)
+            if budget < len(searched) * length:
+                searched = searched[:int(budget // length)]
+            if len(searched) == 0:
+                break
+            scores = sign * self.neighbours(population, representations[searched], costs[searched], totals[searched])
+            self.evaluations += scores.size
+            budget -= scores.size
+
+            # Choose one flip per individual
+            current = sign * fitness[searched]
+            if self.mode == "best":
+                flips = np.argmin(scores, axis=1)
+            elif self.mode == "first":
+                order = population.rng.permutation(length)
+                flips = order[np.argmax(scores[:, order] < current[:, None], axis=1)]
+            improving = scores[np.arange(len(searched)), flips] < current
+            active[searched[~improving]] = False
+            searched, flips, scores = searched[improving], flips[improving], scores[improving]
+            if len(searched) == 0:
+                break
+
+            # Apply the flips and update the totals incrementally
+            signs = 1 - 2 * representations[searched, flips]
+            representations[searched, flips] += signs
+            costs[searched] += signs * population.commodities_matrix[flips, 0]
+            totals[searched] += signs[:, None] * population.commodities_matrix[flips, 1:]
+            fitness[searched] = sign * scores[np.arange(len(searched)), flips]
+            changed[searched] = True
+            self.flips += len(searched)
+            step += 1
+
+        # Evaluate the improved individuals again (no rounding errors of the incremental updates are kept)
+        if changed.any():
+            representations = representations[changed]
+            if population.packed:
+                representations = packing.pack(representations)
+            population.replace(rows[changed], representations)
+            self.improved += int(np.count_nonzero(changed))
+        return int(np.count_nonzero(changed))
+
+    def __repr__(self):
+        return f"LocalSearch(mode={self.mode}, scope={self.scope}); Evaluations: {self.evaluations}; Flips: {self.flips}; Improved: {self.improved}"
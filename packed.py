@@ -0,0 +1,210 @@
+import numpy as np
+from variation import crossover_points, mutation_batch
+
+# Number of rows that are unpacked at once, so that unpacking never needs more memory than chunk_size unpacked rows
+chunk_size = 4096
+
+# Number of set bits of every byte value
+popcount_table = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def pack(representations):
+    """The function packs a 2-D array of binary representations into bytes (8 genes per byte, np.packbits bit order).
+
+    Args:
+        representations (np.ndarray): Binary representations (one per row).
+
+    Returns:
+        np.ndarray: Packed representations (uint8, one per row)
+    """
+    return np.packbits(np.asarray(representations) != 0, axis=1)
+
+
+def unpack(packed, length):
+    """The function unpacks packed representations.
+
+    Args:
+        packed (np.ndarray): Packed representations (one per row).
+        length (int): Number of genes of a representation.
+
+    Returns:
+        np.ndarray: Binary representations (uint8, one per row)
+    """
+    return np.unpackbits(packed, axis=-1, count=length)
+
+
+def unpacked_chunks(packed, length):
+    """The function unpacks packed representations in chunks of chunk_size rows.
+
+    Args:
+        packed (np.ndarray): Packed representations (one per row).
+        length (int): Number of genes of a representation.
+
+    Yields:
+        slice: Rows of the chunk
+        np.ndarray: Unpacked representations of the chunk
+    """
+    for start in range(0, len(packed), chunk_size):
+        rows = slice(start, start + chunk_size)
+        yield rows, unpack(packed[rows], length)
+
+
+def popcount(packed):
+    """The function counts the set bits (selected items) of every packed representation.
+
+    Args:
+        packed (np.ndarray): Packed representations (one per row).
+
+    Returns:
+        np.ndarray: Number of selected items of every representation
+    """
+    return popcount_table[packed].sum(axis=-1, dtype=np.int64)
+
+
+def valid_bits(length):
+    """Returns the packed mask of the bits that belong to a representation of the given length (padding bits are 0)."""
+    return pack(np.ones((1, length), dtype=bool))[0]
+
+
+def random_packed(n, length, rng=None):
+    """The function creates n random packed binary representations (every gene is 0 or 1 with the same probability).
+
+    Args:
+        n (int): Number of representations.
+        length (int): Number of genes of a representation.
+        rng (np.random.Generator, optional): Random number generator. Defaults to the global numpy random state.
+
+    Returns:
+        np.ndarray: Packed representations (one per row)
+    """
+    rng = np.random if rng is None else rng
+    packed = rng.choice(256, size=(n, (length + 7) // 8)).astype(np.uint8)
+    return packed & valid_bits(length)
+
+
+def bit_masks(positions):
+    """Returns the byte index and the bit mask of gene positions in packed representations."""
+    positions = np.asarray(positions)
+    return positions >> 3, (0x80 >> (positions & 7)).astype(np.uint8)
+
+
+def crossover_masks_packed(n, length, xo_type='one-point', points=None, rng=None):
+    """Packed version of variation.crossover_masks. The masks of k-point crossover are built directly in packed form
+    as XOR of the suffix masks of all crossover points, without creating an unpacked mask.
+
+    Args:
+        n (int): Number of pairs.
+        length (int): Length of the representations.
+        xo_type (str, optional): Crossover method that should be used. Defaults to "one-point".
+        points (int, optional): Number of crossover points if xo_type="k-point". Defaults to None.
+        rng (np.random.Generator, optional): Random number generator. Defaults to the global numpy random state.
+
+    Returns:
+        np.ndarray: Packed masks (one per pair)
+    """
+    rng = np.random if rng is None else rng
+    nbytes = (length + 7) // 8
+
+    # uniform crossover: random bytes are random bits
+    if xo_type == 'uniform':
+        return rng.choice(256, size=(n, nbytes)).astype(np.uint8) & valid_bits(length)
+
+    # k-point crossover
+    if xo_type != 'k-point':
+        points = crossover_points[xo_type]
+    if not 0 < points < length:
+        raise ValueError(f"{points}-point crossover needs representations with more than {points} genes.")
+
+    # Draw k distinct crossover points from 1 to length-1 for every pair
+    cuts = np.argpartition(rng.random((n, length - 1)), points - 1, axis=1)[:, :points] + 1
+
+    # XOR of the masks of all bits at or after every crossover point
+    masks = np.zeros((n, nbytes), dtype=np.uint8)
+    byte_index = np.arange(nbytes)
+    for cut in cuts.T:
+        cut_byte, cut_bit = cut[:, None] >> 3, (cut[:, None] & 7).astype(np.uint8)
+        suffix = np.where(byte_index > cut_byte, np.uint8(0xFF), np.uint8(0))
+        suffix |= np.where(byte_index == cut_byte, (np.uint8(0xFF) >> cut_bit).astype(np.uint8), np.uint8(0))
+        masks ^= suffix
+    return masks & valid_bits(length)
+
+
+def crossover_packed(parents1, parents2, length, xo_type='one-point', points=None, crossed=None, rng=None):
+    """Packed version of variation.crossover_batch. The offsprings are combined from the packed parents with bitwise operations.
+
+    Args:
+        parents1 (np.ndarray): First packed parents (one per row).
+        parents2 (np.ndarray): Second packed parents (one per row).
+        length (int): Number of genes of a representation.
+        xo_type (str, optional): Crossover method that should be used. Defaults to "one-point".
+        points (int, optional): Number of crossover points if xo_type="k-point". Defaults to None.
+        crossed (np.ndarray, optional): Boolean array, pairs with False are replicated instead of crossed. Defaults to None.
+        rng (np.random.Generator, optional): Random number generator. Defaults to the global numpy random state.
+
+    Returns:
+        np.ndarray: First packed offsprings
+        np.ndarray: Second packed offsprings
+    """
+    masks = crossover_masks_packed(len(parents1), length, xo_type, points=points, rng=rng)
+    if crossed is not None:
+        # Replicate the parents of the pairs without crossover
+        masks[~crossed] = 0
+
+    # Take the genes of the other parent where the mask is set
+    difference = (parents1 ^ parents2) & masks
+    return parents1 ^ difference, parents2 ^ difference
+
+
+def mutation_packed(offsprings, mutated, length, mutation_type="single_bit_flip", bit_flips=None, rng=None):
+    """Packed version of variation.mutation_batch. Flips are XORed into the packed bytes, only scramble mutation
+    unpacks the mutated rows.
+
+    Args:
+        offsprings (np.ndarray): Packed offsprings for mutation (one per row).
+        mutated (np.ndarray): Boolean array, only rows with True are mutated.
+        length (int): Number of genes of a representation.
+        mutation_type (str, optional): Mutation method that should be used. Defaults to "single_bit_flip".
+        bit_flips (int, optional): Number of bit flips if mutation_type="multiple_bit_flip_mutation". Defaults to None.
+        rng (np.random.Generator, optional): Random number generator. Defaults to the global numpy random state.
+
+    Returns:
+        np.ndarray: Mutated packed offsprings
+    """
+    rng = np.random if rng is None else rng
+    rows = np.flatnonzero(mutated)
+    n = len(rows)
+    if n == 0:
+        return offsprings
+
+    # Single Bit Flip Mutation
+    if mutation_type == "single_bit_flip":
+        byte, bit = bit_masks(rng.choice(length, size=n))
+        offsprings[rows, byte] ^= bit
+
+    # Complete Bit Flip Mutation (padding bits stay 0)
+    elif mutation_type == "complete_bit_flip":
+        offsprings[rows] ^= valid_bits(length)
+
+    # Swap Mutation (Single Bit): swapping two different bits flips both of them
+    elif mutation_type == "single_swap_mutation":
+        first = rng.choice(length, size=n)
+        second = (first + 1 + rng.choice(length - 1, size=n)) % length
+        (byte1, bit1), (byte2, bit2) = bit_masks(first), bit_masks(second)
+        different = ((offsprings[rows, byte1] & bit1) != 0) != ((offsprings[rows, byte2] & bit2) != 0)
+        offsprings[rows[different], byte1[different]] ^= bit1[different]
+        offsprings[rows[different], byte2[different]] ^= bit2[different]
+
+    # Multiple Bit Flip Mutation (a bit drawn twice is flipped back)
+    elif mutation_type == "multiple_bit_flip_mutation":
+        byte, bit = bit_masks(rng.choice(length, size=(n, bit_flips)))
+        np.bitwise_xor.at(offsprings, (np.repeat(rows, bit_flips), byte.ravel()), bit.ravel())
+
+    # Scramble Mutation on the unpacked mutated rows
+    elif mutation_type == "scramble_mutation":
+        for start in range(0, n, chunk_size):
+            chunk = rows[start:start + chunk_size]
+            unpacked = unpack(offsprings[chunk], length)
+            mutation_batch(unpacked, np.ones(len(chunk), dtype=bool), mutation_type, rng=rng)
+            offsprings[chunk] = pack(unpacked)
+
+    return offsprings
@@ -1,31 +1,599 @@
-from data import commodities, nutrients
-from random import random
+from data import commodity_names, commodities_matrix, nutrients_vector
+from random import random, getstate, setstate
 from individual import Individual
-from copy import deepcopy
+from selection import batch_selection, elite_indices
+from variation import batch_crossover, batch_mutation, crossover as default_crossover, mutation as default_mutation
+import packed as packing
+from profiling import null_profiler
+from history import History
+import seeding
+import diversity as diversity_metrics
 from operator import attrgetter
+import os
+import pickle
+import numpy as np
 
 
 class Population:
-    def __init__(self, size, optim, **kwargs):
+    def __init__(self, size, optim, batch=False, packed=False, rng=None, **kwargs):
         self.individuals = []
         self.size = size
         self.optim = optim
-        self.history_fitness = []
-        self.history_calories = []
-        self.history_protein = []
-        self.history_carbohydrates = []
-        self.history_fat = []
-        self.history_sodium = []
+        # Random number generator of the batch operators (defaults to the global numpy random state)
+        self.rng = np.random if rng is None else rng
+        # Packed populations store 8 genes per byte and are always batch populations
+        self.packed = packed
+        self.batch = batch or packed
+        self.length = kwargs["sol_size"]
+        self.valid_set = kwargs["valid_set"]
+        self.replacement = kwargs["replacement"]
+        if self.packed and not self.binary:
+            raise Exception("Packed populations need binary representations (valid_set=[0, 1] with replacement).")
+        # Menu and constraints the population is evaluated against (defaults to the data of data.py)
+        self.commodity_names = kwargs.get("commodity_names", commodity_names)
+        self.commodities_matrix = kwargs.get("commodities_matrix", commodities_matrix)
+        self.constraints = kwargs.get("constraints", nutrients_vector)
+        if not self.batch and (self.commodities_matrix is not commodities_matrix or self.constraints is not nutrients_vector):
+            raise Exception("Custom menus and constraints need a batch population, Individuals are evaluated against the menu of data.py.")
+        # Optional FitnessCache shared across generations (and runs with the same constraints)
+        self.fitness_cache = kwargs.get("fitness_cache")
+        # Number of fitness evaluations of the population (by get_fitness_batch or of new individuals in evolve)
+        self.evaluations = 0
+        if self.fitness_cache is not None:
+            self.fitness_cache.check(self.constraints, self.commodities_matrix)
+        # Best individual (and optionally population statistics) of every generation, optionally streamed to a .npy file
+        self.history = History(
+            len(self.constraints),
+            stats=kwargs.get("history_stats", False),
+            path=kwargs.get("history_path"),
+            chunk_size=kwargs.get("history_chunk", 100),
+            diversity=kwargs.get("history_diversity", False),
+        )
+        # Number of sampled pairs of the mean Hamming distance (None computes it exactly, see diversity.mean_hamming)
+        self.diversity_pairs = kwargs.get("diversity_pairs")
+        # Own random number generator of the sampled pairs, so that measuring the diversity does not change the evolution
+        self.diversity_rng = np.random.default_rng(kwargs.get("diversity_seed", 0))
+        # Number of duplicated offsprings that were replaced before their evaluation (evolve with dedup=True)
+        self.duplicates = 0
+        # Number of generations evolved so far (over all evolve calls)
+        self.generation = 0
         self.history_products = []
+        # Optional heuristic seeds (see seeding.py) that replace a share of the random individuals
+        strategy = kwargs.get("seeding")
+        seed_kwargs = dict(ratio=kwargs.get("seed_ratio", 0.5), alpha=kwargs.get("seed_alpha", 0.2))
+        if self.batch:
+            # Store all representations in one contiguous 2-D array and evaluate them in one pass
+            representations = self.random_representations(size)
+            if strategy is not None:
+                seeds = self.seeds(self.unpacked(representations), strategy, **seed_kwargs)
+                representations[:len(seeds)] = packing.pack(seeds) if self.packed else seeds
+            self.set_representations(representations)
+            return
         for _ in range(size):
             self.individuals.append(
                 Individual(
                 size=kwargs["sol_size"],
                 replacement=kwargs["replacement"],
                 valid_set=kwargs["valid_set"],
+                fitness_cache=self.fitness_cache,
             ))
+        if strategy is not None:
+            representations = np.array([individual.representation for individual in self.individuals])
+            for i, representation in enumerate(self.seeds(representations, strategy, **seed_kwargs)):
+                self.individuals[i] = Individual(representation, fitness_cache=self.fitness_cache)
+        self.flush()
+
+    @property
+    def binary(self):
+        """True if the representations are binary (every gene is 0 or 1)."""
+        return self.replacement == True and sorted(self.valid_set) == [0, 1]
+
+    def seeds(self, representations, strategy, ratio, alpha):
+        """Returns the heuristic seeds of the initial population (see seeding.seeds), only for binary representations."""
+        if not self.binary:
+            raise Exception("Heuristic seeding is only supported for binary representations.")
+        if not isinstance(self.commodities_matrix, np.ndarray):
+            raise Exception("Heuristic seeding needs a dense commodity matrix (e.g. commodities_matrix.toarray()).")
+        return seeding.seeds(representations, strategy, ratio, self.commodities_matrix, self.constraints, alpha, self.rng)
+
+    def random_representations(self, n):
+        """Returns n random representations of a batch population as 2-D array (packed for packed populations)."""
+        if self.packed:
+            # Random bytes are random bits, so the representations are created without unpacking
+            return packing.random_packed(n, self.length, rng=self.rng)
+        if self.replacement == True:
+            representations = self.rng.choice(self.valid_set, size=(n, self.length))
+        elif self.replacement == False:
+            representations = np.array([self.rng.choice(self.valid_set, size=self.length, replace=False) for _ in range(n)])
+        return representations
+
+    @property
+    def individuals(self):
+        # In batch mode the Individual objects are only built from the arrays when they are accessed
+        if self._individuals is None:
+            self._individuals = [
+                Individual(representation, fitness=fitness, costs=costs, totals=totals)
+                for representation, fitness, costs, totals in zip(self.unpacked(), self.fitness, self.costs, self.totals)
+            ]
+        return self._individuals
+
+    @individuals.setter
+    def individuals(self, individuals):
+        self._individuals = individuals
+
+    @property
+    def history_fitness(self):
+        return self.history["fitness"]
+
+    def history_nutrient(self, column):
+        """Returns the history of one nutrient of the best individuals (NaN if the menu has fewer nutrient columns)."""
+        totals = self.history["totals"]
+        if column < totals.shape[1]:
+            return totals[:, column]
+        return np.full(len(totals), np.nan)
+
+    # Nutrients of the McDonald's menu (columns of data.py), other menus can use history["totals"]
+    @property
+    def history_calories(self):
+        return self.history_nutrient(0)
+
+    @property
+    def history_fat(self):
+        return self.history_nutrient(1)
+
+    @property
+    def history_sodium(self):
+        return self.history_nutrient(2)
+
+    @property
+    def history_carbohydrates(self):
+        return self.history_nutrient(3)
+
+    @property
+    def history_protein(self):
+        return self.history_nutrient(4)
+
+    def record_history(self, fitness, costs, totals):
+        """Stores the best individual of the current generation (and the population statistics if enabled) in the history."""
+        population_fitness = None
+        if self.history.stats:
+            population_fitness = self.fitness if self.batch else np.array([individual.fitness for individual in self.individuals])
+        stats = self.diversity_stats() if self.history.diversity else None
+        self.history.append(self.generation, fitness, costs, totals, population_fitness, stats)
+        self.generation += 1
+
+    def save_checkpoint(self, path, evolved):
+        """This function saves the population, the history and all random number states, so that evolve can be resumed.
+        The file is replaced atomically, an interrupted write keeps the previous checkpoint.
+
+        Args:
+            path (str): Path of the checkpoint file.
+            evolved (int): Number of generations of the current evolve call that are finished.
+        """
+        if self.batch:
+            arrays = (self.representations, self.fitness, self.costs, self.totals)
+        else:
+            arrays = (
+                np.array([individual.representation for individual in self.individuals]),
+                np.array([individual.fitness for individual in self.individuals]),
+                np.array([individual.costs for individual in self.individuals]),
+                np.array([individual.totals for individual in self.individuals]),
+            )
+        state = {
+            "evolved": evolved,
+            "generation": self.generation,
+            "arrays": arrays,
+            # Streamed histories stay in their file, only the number of written records and the records in memory are saved
+            "history": self.history.state(),
+            "random": getstate(),
+            "np_random": np.random.get_state(),
+            # Generators passed as rng have their own state (np.random is covered above)
+            "rng": self.rng.bit_generator.state if isinstance(self.rng, np.random.Generator) else None,
+            "diversity_rng": self.diversity_rng.bit_generator.state,
+        }
+        with open(path + ".tmp", "wb") as file:
+            pickle.dump(state, file)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(path + ".tmp", path)
+
+    def load_checkpoint(self, path):
+        """This function restores the population, the history and all random number states from a checkpoint (see save_checkpoint).
+
+        Args:
+            path (str): Path of the checkpoint file.
+
+        Returns:
+            int: Number of generations of the interrupted evolve call that were finished
+        """
+        with open(path, "rb") as file:
+            state = pickle.load(file)
+        representations, fitness, costs, totals = state["arrays"]
+        if self.batch:
+            self.set_representations(representations, fitness, costs, totals)
+        else:
+            self.individuals = [
+                Individual(representations[i], fitness=fitness[i], costs=costs[i], totals=totals[i]) for i in range(len(representations))
+            ]
+        self.generation = state["generation"]
+        self.history.restore(state["history"])
+        setstate(state["random"])
+        np.random.set_state(state["np_random"])
+        if state["rng"] is not None:
+            self.rng.bit_generator.state = state["rng"]
+        self.diversity_rng.bit_generator.state = state["diversity_rng"]
+        return state["evolved"]
+
+    def unpacked(self, representations=None):
+        """Returns the (unpacked) representations of the population or the passed packed representations."""
+        representations = self.representations if representations is None else representations
+        if self.packed:
+            return packing.unpack(representations, self.length)
+        return representations
+
+    def item_counts(self):
+        """Returns the number of selected items of every individual of a batch population."""
+        if self.packed:
+            return packing.popcount(self.representations)
+        return np.count_nonzero(self.representations, axis=1)
+
+    def get_fitness_batch(self, representations):
+        raise Exception("You need to monkey patch the batch fitness path.")
+
+    def get_flip_fitness(self, representations, costs, totals):
+        raise Exception("You need to monkey patch the flip fitness path.")
+
+    # Unpatched batch fitness path (scalar populations evaluate their individuals one by one until get_fitness_batch is patched)
+    unpatched_fitness_batch = get_fitness_batch
+
+    def batch_matches_fitness(self):
+        """True if the patched batch fitness path computes the patched Individual.get_fitness (paired by its fitness attribute,
+        e.g. fitness.get_fitness_batch.fitness = fitness.get_fitness), so that scalar populations can evaluate with it."""
+        return getattr(type(self).get_fitness_batch, "fitness", None) is Individual.get_fitness
+
+    def flush(self, individuals=None):
+        """This function evaluates all individuals whose fitness was not computed yet. If the batch fitness path is patched
+        and paired with the patched get_fitness (see batch_matches_fitness), they are evaluated together with one call of
+        get_fitness_batch, otherwise one by one. Mutated copies of a parent are always evaluated incrementally if get_fitness_delta is patched.
+        Representations in the fitness cache and duplicates are evaluated only once.
+
+        Args:
+            individuals (list, optional): Individuals to evaluate. Defaults to the individuals of the population.
+        """
+        individuals = self.individuals if individuals is None else individuals
+        pending = [individual for individual in individuals if not individual.evaluated]
+        if not pending:
+            return
+        if not self.batch_matches_fitness():
+            for individual in pending:
+                individual.evaluate()
+            return
+
+        # Mutated copies of a parent are cheaper to update incrementally than to evaluate in the batch
+        if Individual.get_fitness_delta is not None:
+            for individual in pending:
+                if individual.parent is not None:
+                    individual.evaluate()
+            pending = [individual for individual in pending if not individual.evaluated]
+            if not pending:
+                return
+
+        # Group the individuals by representation, cached representations are not evaluated again
+        groups = {}
+        for individual in pending:
+            fitness_cache = individual.fitness_cache
+            if fitness_cache is None:
+                groups[id(individual)] = [individual]
+                continue
+            key = fitness_cache.key(individual.representation)
+            if key in groups:
+                groups[key].append(individual)
+                continue
+            entry = fitness_cache.get(key)
+            if entry is not None:
+                individual.set_fitness(*entry)
+            else:
+                groups[key] = [individual]
+        if not groups:
+            return
+
+        # Evaluate one representation of every group in one batch
+        fitness, costs, totals = self.get_fitness_batch(np.array([group[0].representation for group in groups.values()]))
+        Individual.evaluations += len(groups)
+        for j, (key, group) in enumerate(groups.items()):
+            if group[0].fitness_cache is not None:
+                group[0].fitness_cache.put(key, fitness[j], costs[j], totals[j])
+            for individual in group:
+                individual.set_fitness(fitness[j], costs[j], totals[j])
+
+    def set_representations(self, representations, fitness=None, costs=None, totals=None):
+        """This function replaces the representations of a batch population. If no fitness values are passed, 
+        the whole generation is evaluated in one batch (see evaluate).
+
+        Args:
+            representations (np.ndarray): 2-D array with the representation of one individual per row.
+            fitness (np.ndarray, optional): Already computed fitness values. Defaults to None.
+            costs (np.ndarray, optional): Already computed total costs. Defaults to None.
+            totals (np.ndarray, optional): Already computed total nutrition values. Defaults to None.
+        """
+        self.representations = np.ascontiguousarray(representations)
+        if fitness is None:
+            fitness, costs, totals = self.evaluate(self.representations)
+        self.fitness, self.costs, self.totals = fitness, costs, totals
+        self.individuals = None
+
+    def evaluate(self, representations):
+        """This function evaluates a 2-D array of representations with one call of get_fitness_batch.
+        If the population has a fitness cache, only the representations that are not cached yet are evaluated.
+
+        Args:
+            representations (np.ndarray): 2-D array with the representation of one individual per row.
+
+        Returns:
+            np.ndarray: fitness of every individual
+            np.ndarray: total cost/price of every individual
+            np.ndarray: total nutrition values of every individual (one row per individual)
+        """
+        if self.fitness_cache is None:
+            return self.evaluate_all(representations)
+
+        # Look up every row, duplicated rows of the batch are evaluated only once
+        entries = []
+        pending = {}
+        if self.packed:
+            keys = self.fitness_cache.packed_keys(representations, self.length)
+        else:
+            keys = self.fitness_cache.keys(representations)
+        for i, key in enumerate(keys):
+            if key in pending:
+                pending[key].append(i)
+                entries.append(None)
+                continue
+            entry = self.fitness_cache.get(key)
+            if entry is None:
+                pending[key] = [i]
+            entries.append(entry)
+
+        # Evaluate the missing representations in one batch and store them in the cache
+        if pending:
+            rows = [indices[0] for indices in pending.values()]
+            fitness, costs, totals = self.evaluate_all(representations[rows])
+            for j, (key, indices) in enumerate(pending.items()):
+                self.fitness_cache.put(key, fitness[j], costs[j], totals[j])
+                for i in indices:
+                    entries[i] = (fitness[j], costs[j], totals[j])
+
+        fitness, costs, totals = zip(*entries)
+        return np.array(fitness), np.array(costs), np.array(totals)
+
+    def evaluate_all(self, representations):
+        """Evaluates all passed representations with get_fitness_batch. Packed representations are unpacked in chunks."""
+        self.evaluations += len(representations)
+        if not self.packed:
+            return self.get_fitness_batch(representations)
+        fitness, costs, totals = np.empty(len(representations)), np.empty(len(representations)), None
+        for rows, chunk in packing.unpacked_chunks(representations, self.length):
+            fitness[rows], costs[rows], chunk_totals = self.get_fitness_batch(chunk)
+            if totals is None:
+                totals = np.empty((len(representations), chunk_totals.shape[1]))
+            totals[rows] = chunk_totals
+        return fitness, costs, totals
+
+    def select_parents(self, select, tournament_k=None):
+        """This function selects the parents of a new generation. If the selection function has a batch variant 
+        (see selection.batch_selection), all parents are drawn in one shot, otherwise select is called for every parent.
+
+        Args:
+            select (function): Selection function.
+            tournament_k (int, optional): Tournament size if tournament selection is passed. Defaults to None.
+
+        Returns:
+            list: First parents of all pairs (2-D array of representations for batch populations)
+            list: Second parents of all pairs (2-D array of representations for batch populations)
+        """
+        pairs = (len(self) + 1) // 2
+        kwargs = {} if tournament_k is None else {"k": tournament_k}
+
+        select_batch = batch_selection.get(select)
+        if select_batch is not None:
+            # Draw the indices of all parents at once
+            first = select_batch(self, pairs, rng=self.rng, **kwargs)
+            second = select_batch(self, pairs, rng=self.rng, **kwargs)
+            if self.batch:
+                return self.representations[first], self.representations[second]
+            return [self.individuals[i] for i in first], [self.individuals[i] for i in second]
+
+        parents1 = [select(self, **kwargs) for _ in range(pairs)]
+        parents2 = [select(self, **kwargs) for _ in range(pairs)]
+        if self.batch:
+            return np.array([parent.representation for parent in parents1]), np.array([parent.representation for parent in parents2])
+        return parents1, parents2
+
+    def ranking(self):
+        """Returns the indices of all individuals sorted from the best to the worst fitness."""
+        fitness = self.fitness if self.batch else np.array([individual.fitness for individual in self.individuals])
+        if self.optim == "max":
+            return np.argsort(-fitness, kind="stable")
+        elif self.optim == "min":
+            return np.argsort(fitness, kind="stable")
+
+    def emigrants(self, n):
+        """This function returns the n best individuals as compact arrays, e.g. for the migration between islands.
+        Binary representations are packed, other representations are returned unchanged.
+
+        Args:
+            n (int): Number of emigrants.
+
+        Returns:
+            np.ndarray: Packed (binary) or plain representations (see packed.pack)
+            np.ndarray: Fitness values
+            np.ndarray: Total costs
+            np.ndarray: Total nutrition values (one row per emigrant)
+        """
+        best = self.ranking()[:n]
+        if self.batch:
+            representations = self.representations[best]
+            if self.binary and not self.packed:
+                representations = packing.pack(representations)
+            return representations, self.fitness[best], self.costs[best], self.totals[best]
+        individuals = [self.individuals[i] for i in best]
+        representations = np.array([individual.representation for individual in individuals])
+        return (
+            packing.pack(representations) if self.binary else representations,
+            np.array([individual.fitness for individual in individuals]),
+            np.array([individual.costs for individual in individuals]),
+            np.array([individual.totals for individual in individuals]),
+        )
+
+    def immigrate(self, representations, fitness, costs, totals):
+        """This function replaces the worst individuals of the population by immigrants (arrays as returned by emigrants).
+
+        Args:
+            representations (np.ndarray): Packed (binary) or plain representations of the immigrants.
+            fitness (np.ndarray): Fitness values of the immigrants.
+            costs (np.ndarray): Total costs of the immigrants.
+            totals (np.ndarray): Total nutrition values of the immigrants.
+        """
+        worst = self.ranking()[::-1][:len(representations)]
+        if self.batch:
+            if self.binary and not self.packed:
+                representations = packing.unpack(representations, self.length).astype(self.representations.dtype)
+            self.representations[worst] = representations
+            self.fitness[worst], self.costs[worst], self.totals[worst] = fitness, costs, totals
+            self.individuals = None
+            return
+        if self.binary:
+            representations = packing.unpack(representations, self.length).astype(int)
+        for j, i in enumerate(worst):
+            self.individuals[i] = Individual(representations[j], fitness=fitness[j], costs=costs[j], totals=totals[j])
+
+    def replace(self, indices, representations):
+        """This function replaces the representations of the individuals at indices and evaluates them in one batch.
+
+        Args:
+            indices (np.ndarray): Indices of the replaced individuals.
+            representations (np.ndarray): 2-D array with the new representations (packed for packed populations).
+        """
+        if self.batch:
+            self.representations[indices] = representations
+            self.fitness[indices], self.costs[indices], self.totals[indices] = self.evaluate(representations)
+            self.individuals = None
+            return
+        evaluations = Individual.evaluations
+        for i, representation in zip(indices, representations):
+            self.individuals[i] = Individual(representation, fitness_cache=self.fitness_cache)
+        self.flush()
+        self.evaluations += Individual.evaluations - evaluations
+
+    def reseed(self, n):
+        """This function replaces the n worst individuals by new random individuals (partial restart).
+
+        Args:
+            n (int): Number of re-seeded individuals.
+        """
+        if n <= 0:
+            return
+        worst = self.ranking()[::-1][:n]
+        if self.batch:
+            return self.replace(worst, self.random_representations(len(worst)))
+        evaluations = Individual.evaluations
+        for i in worst:
+            self.individuals[i] = Individual(
+                size=self.length, replacement=self.replacement, valid_set=self.valid_set, fitness_cache=self.fitness_cache
+            )
+        self.flush()
+        self.evaluations += Individual.evaluations - evaluations
+
+    def diversity(self):
+        """Returns the mean fraction of genes in which the individuals differ from the best individual (0 if all are equal)."""
+        if self.batch:
+            best = self.representations[self.best_index()]
+            if self.packed:
+                return float(np.mean(packing.popcount(self.representations ^ best))) / self.length
+            return float(np.mean(self.representations != best))
+        representations = np.array([individual.representation for individual in self.individuals])
+        return float(np.mean(representations != representations[self.ranking()[0]]))
+
+    def genomes(self):
+        """Returns the representations of all individuals as 2-D array (packed for packed populations)."""
+        if self.batch:
+            return self.representations
+        return np.array([individual.representation for individual in self.individuals])
+
+    def unique_count(self):
+        """Returns the number of distinct genomes of the population."""
+        return diversity_metrics.unique_count(self.genomes())
+
+    def allele_frequencies(self):
+        """Returns the share of individuals with value v (rows, in the order of valid_set) at gene j (columns)."""
+        counts = diversity_metrics.allele_counts(self.genomes(), self.valid_set, self.packed, self.length)
+        return counts / len(self)
+
+    def mean_hamming(self, pairs=None):
+        """Returns the mean Hamming distance of all pairs of individuals as fraction of the genes (see diversity.mean_hamming),
+        exact or estimated from pairs sampled pairs (defaults to diversity_pairs of the population)."""
+        pairs = self.diversity_pairs if pairs is None else pairs
+        return diversity_metrics.mean_hamming(self.genomes(), self.valid_set, self.packed, self.length, pairs, self.diversity_rng)
+
+    def diversity_stats(self, pairs=None):
+        """Returns the mean Hamming distance and the number of unique genomes of the population (stored in the history with history_diversity=True)."""
+        return {"hamming": self.mean_hamming(pairs), "unique": self.unique_count()}
+
+    def deduplicate(self, representations):
+        """This function replaces offsprings of a batch population that are equal to an earlier offspring or to an individual
+        of the current generation by new random representations (before they are evaluated).
+
+        Args:
+            representations (np.ndarray): 2-D array with the offsprings (packed for packed populations), changed in place.
+
+        Returns:
+            int: Number of replaced offsprings
+        """
+        duplicated = np.flatnonzero(diversity_metrics.duplicates(representations, self.representations))
+        if len(duplicated):
+            representations[duplicated] = self.random_representations(len(duplicated))
+        self.duplicates += len(duplicated)
+        return len(duplicated)
+
+    def deduplicate_individuals(self, individuals):
+        """Scalar version of deduplicate: duplicated Individuals of the list are replaced by new random Individuals (in place).
+
+        Args:
+            individuals (list): Offsprings that are not evaluated yet.
+
+        Returns:
+            int: Number of replaced offsprings
+        """
+        representations = np.array([individual.representation for individual in individuals])
+        duplicated = np.flatnonzero(diversity_metrics.duplicates(representations, self.genomes()))
+        for i in duplicated:
+            individuals[i] = Individual(
+                size=self.length, replacement=self.replacement, valid_set=self.valid_set, fitness_cache=self.fitness_cache
+            )
+        self.duplicates += len(duplicated)
+        return len(duplicated)
+
+    def improve(self, local_search, generation, profiler):
+        """Applies the local search to the population every local_search.interval generations (see evolve)."""
+        if local_search is None or (generation + 1) % local_search.interval != 0:
+            return
+        if not isinstance(self.commodities_matrix, np.ndarray):
+            raise Exception("The local search needs a dense commodity matrix (e.g. commodities_matrix.toarray()).")
+        with profiler.phase("local_search"):
+            evaluations = local_search.evaluations
+            local_search.apply(self)
+        profiler.count("local_search", local_search.evaluations - evaluations)
+
+    def best_index(self):
+        """Returns the index of the best individual of a batch population."""
+        if self.optim == "max":
+            return int(np.argmax(self.fitness))
+        elif self.optim == "min":
+            return int(np.argmin(self.fitness))
 
     def __len__(self):
+        if self.batch:
+            return len(self.representations)
         return len(self.individuals)
 
     def __getitem__(self, position):
@@ -48,7 +616,17 @@ class Population:
             bit_flips = None,
             xo_prob = 0.9,
             xo_type = "one-point",
-            elitism=True
+            elitism=True,
+            elites = 1,
+            xo_points = None,
+            profiler = None,
+            checkpoint = None,
+            checkpoint_interval = 10,
+            resume = False,
+            termination = None,
+            restart = None,
+            local_search = None,
+            dedup = False,
     ):
         """This function evolves the initial/current population over a defined number of generations. Through the parameters different methods
         for the selection, crossover and mutation can be assigned, as well as the crossover and mutation probabilites.  
@@ -65,81 +643,130 @@ class Population:
             xo_prob (float, optional): Probability of applying crossover. Defaults to 0.9.
             xo_type (str, optional): Crossover method of the passed crossover function that should be used. Defaults to "one-point".
             elitism (bool, optional): Enable/Disable elitism. Defaults to True.
+            elites (int, optional): Number of best individuals that are kept if elitism is enabled. Defaults to 1.
+            xo_points (int, optional): Number of crossover points if xo_type="k-point". Defaults to None.
+            profiler (Profiler, optional): Profiler that times the phases of every generation (see profiling.py). Defaults to None.
+            checkpoint (str, optional): File the population and random number states are saved to every checkpoint_interval generations. Defaults to None.
+            checkpoint_interval (int, optional): Number of generations between two checkpoints. Defaults to 10.
+            resume (bool, optional): Continue from the checkpoint file if it exists instead of starting over. Defaults to False.
+            termination (Termination, optional): Criteria that stop evolve before gens generations (see termination.py). Defaults to None.
+            restart (Restart, optional): Policy that re-seeds a part of a stagnating population (see termination.py). Defaults to None.
+            local_search (LocalSearch, optional): Memetic bit-flip local search applied after every generation (see memetic.py). Defaults to None.
+            dedup (bool, optional): Replace duplicated offsprings (equal to another offspring or a current individual) by random individuals before their evaluation. Defaults to False.
         """
+        profiler = null_profiler if profiler is None else profiler
+
+        # Continue an interrupted run after the last finished checkpoint
+        start = 0
+        if resume and checkpoint is not None and os.path.exists(checkpoint):
+            start = self.load_checkpoint(checkpoint)
+        self.history.reserve(gens - start)
+        for policy in (termination, restart):
+            if policy is not None:
+                policy.start(self)
+
+        # Batch populations evaluate every generation with one matrix multiplication
+        if self.batch:
+            self._evolve_batch(
+                select, tournament_k, crossover, mutate, range(start, gens), mut_prob, mut_type, bit_flips,
+                xo_prob, xo_type, elitism, elites, xo_points, profiler, checkpoint, checkpoint_interval, termination, restart, local_search, dedup,
+            )
+            self.history.flush()
+            return
+
+        # The number of crossover points is only passed for k-point crossover
+        xo_kwargs = {} if xo_points is None else {"points": xo_points}
+
+        # Mutated copies of unchanged parents are evaluated incrementally if a delta fitness path is patched
+        delta = Individual.get_fitness_delta is not None
+
         # Iterate over the specified number of generations
-        for i in range(gens):
+        for i in range(start, gens):
             new_gen = []
+            evaluations = Individual.evaluations
+
+            # Select all parents for reproduction
+            with profiler.phase("selection"):
+                parents1, parents2 = self.select_parents(select, tournament_k)
             
             # Generate a new generation
-            while len(new_gen) < len(self):
-                # Select parents for reproduction
-                if tournament_k is None:
-                    # Select two parents using the provided selection method
-                    parent1, parent2 = select(self), select(self)
-                else:
-                    # Select two parents using tournament selection with k participants
-                    parent1 = select(self, k=tournament_k)
-                    parent2 = select(self, k=tournament_k)
-                
+            for parent1, parent2 in zip(parents1, parents2):
                 # Perform crossover to create offspring
-                if random() < xo_prob:
-                    # Perform crossover between parent1 and parent2 using the specified method
-                    offspring1, offspring2 = crossover(parent1, parent2, xo_type)
-                else: 
-                    # Replicate parents if crossover probability is not met
-                    offspring1 = parent1
-                    offspring2 = parent2
-                
-                # Perform mutation on offsprings
-                if random() < mut_prob: 
-                    # Mutate offspring1 using the specified mutation method, bit flips, and cycles
-                    offspring1 = mutate(offspring1, mut_type, bit_flips=bit_flips)
-                if random() < mut_prob:
-                    # Mutate offspring2 using the specified mutation method
-                    offspring2 = mutate(offspring2, mut_type, bit_flips=bit_flips)
+                with profiler.phase("crossover"):
+                    if random() < xo_prob:
+                        # Perform crossover between parent1 and parent2 using the specified method
+                        offspring1, offspring2 = crossover(parent1, parent2, xo_type, **xo_kwargs)
+                        parents = (None, None)
+                    else: 
+                        # Replicate parents if crossover probability is not met
+                        # (copies, so that a mutation does not change the parents in the current generation)
+                        offspring1 = parent1.representation.copy()
+                        offspring2 = parent2.representation.copy()
+                        parents = (parent1, parent2)
                 
-                # Add the offsprings to the new generation
-                new_gen.append(Individual(offspring1))
-                new_gen.append(Individual(offspring2))
+                for offspring, parent in zip((offspring1, offspring2), parents):
+                    changes = (np.array([], dtype=np.intp), np.array([]))
+                    # Perform mutation on the offspring using the specified mutation method
+                    with profiler.phase("mutation"):
+                        if random() < mut_prob:
+                            if delta and parent is not None:
+                                offspring, changes = mutate(offspring, mut_type, bit_flips=bit_flips, return_changes=True)
+                            else:
+                                offspring = mutate(offspring, mut_type, bit_flips=bit_flips)
+                    
+                    # Add the offspring to the new generation (evaluated below)
+                    new_gen.append(Individual(offspring, parent=parent, changes=changes, fitness_cache=self.fitness_cache))
+
+            # Replace duplicated offsprings, so that no evaluation and slot is spent on a genome twice
+            if dedup:
+                with profiler.phase("dedup"):
+                    profiler.count("duplicates", self.deduplicate_individuals(new_gen))
+
+            # Evaluate all offsprings of the new generation at once
+            with profiler.phase("evaluation"):
+                self.flush(new_gen)
+            profiler.count("offsprings", len(new_gen))
+            profiler.count("evaluations", Individual.evaluations - evaluations)
+            self.evaluations += Individual.evaluations - evaluations
             
-            # Apply elitism by replacing the worst individuals in the current generation with the best individuals from the new generation
-            if elitism:
-                # elitism for maximization problem
-                if self.optim == "max":
-                    # Find the best individual in the current generation
-                    elite = deepcopy(max(self.individuals, key=attrgetter("fitness")))
-                    # Find the worst individual in the new generation
-                    worst_new = min(new_gen, key=attrgetter("fitness"))
-                    # Replace the worst individual with the elite individual if it has better fitness
-                    if elite.fitness > worst_new.fitness:
-                        new_gen.pop(new_gen.index(worst_new))
-                        new_gen.append(elite)
-                # elitism for minimization problem
-                elif self.optim == "min":
-                    # Find the best individual in the current generation
-                    elite = deepcopy(min(self.individuals, key=attrgetter("fitness")))
-                    # Find the worst individual in the new generation
-                    worst_new = max(new_gen, key=attrgetter("fitness"))
-                    # Replace the worst individual with the elite individual if it has better fitness
-                    if elite.fitness < worst_new.fitness:
-                        new_gen.pop(new_gen.index(worst_new))
-                        new_gen.append(elite)
+            # Apply elitism by replacing the worst individuals of the new generation with the best individuals of the current generation
+            with profiler.phase("elitism"):
+                if elitism:
+                    fitness = np.array([individual.fitness for individual in self.individuals])
+                    new_fitness = np.array([individual.fitness for individual in new_gen])
+                    for elite, worst_new in zip(*elite_indices(fitness, new_fitness, elites, self.optim)):
+                        # Copy the genome row only, the fitness values are kept
+                        individual = self.individuals[elite]
+                        new_gen[worst_new] = Individual(
+                            individual.representation.copy(), fitness=individual.fitness, costs=individual.costs, totals=individual.totals
+                        )
             
             # Update the current generation with the new generation
             self.individuals = new_gen
+
+            # Improve the best individuals (or all) by local search
+            self.improve(local_search, i, profiler)
             
             # Store the fitness and other metrics of the best individual in each generation
-            if self.optim == "max":
-                best = max(self, key=attrgetter("fitness"))
-            elif self.optim == "min":
-                best = min(self, key=attrgetter("fitness"))
-            self.history_fitness.append(best.fitness)
-            self.history_calories.append(best.totals[0])
-            self.history_fat.append(best.totals[1]) 
-            self.history_sodium.append(best.totals[2]) 
-            self.history_carbohydrates.append(best.totals[3]) 
-            self.history_protein.append(best.totals[4]) 
-        commodity_keys = list(commodities.keys())
+            with profiler.phase("history"):
+                if self.optim == "max":
+                    best = max(self, key=attrgetter("fitness"))
+                elif self.optim == "min":
+                    best = min(self, key=attrgetter("fitness"))
+                self.record_history(best.fitness, best.costs, best.totals)
+            profiler.end_generation(self)
+
+            # Save the state after every checkpoint_interval generations
+            if checkpoint is not None and (i + 1) % checkpoint_interval == 0:
+                self.save_checkpoint(checkpoint, i + 1)
+
+            # Stop early or re-seed a stagnating population
+            if termination is not None and termination.update(self, best.fitness):
+                break
+            if restart is not None:
+                restart.update(self, best.fitness)
+        self.history.flush()
+        commodity_keys = self.commodity_names
 
         if self.optim == "max":
             for i, j in zip(max(self, key=attrgetter("fitness")).representation, commodity_keys):
@@ -148,4 +775,102 @@ class Population:
         elif self.optim == "min":
             for i, j in zip(min(self, key=attrgetter("fitness")).representation, commodity_keys):
                 if i == 1:
-                    self.history_products.append(j)
\ No newline at end of file
+                    self.history_products.append(j)
+
+    def _evolve_batch(self, select, tournament_k, crossover, mutate, generations, mut_prob, mut_type, bit_flips, xo_prob, xo_type, elitism,
+                      elites, xo_points, profiler, checkpoint, checkpoint_interval, termination, restart, local_search, dedup):
+        """Batch version of evolve. The parameters are the same as in evolve (generations is the range of the generations 
+        that are left), but the offsprings of a generation are collected in one 2-D array and scored with a single call of get_fitness_batch.
+        """
+        crossover_all = batch_crossover.get(crossover)
+        mutate_all = batch_mutation.get(mutate)
+        xo_kwargs = {} if xo_points is None else {"points": xo_points}
+        if self.packed:
+            # Packed populations use the bitwise kernels of the built-in operators
+            if crossover is not default_crossover or mutate is not default_mutation:
+                raise Exception("Packed populations only support the built-in crossover and mutation functions.")
+            crossover_all = lambda parents1, parents2, xo_type, **kwargs: packing.crossover_packed(parents1, parents2, self.length, xo_type, **kwargs)
+            mutate_all = lambda offsprings, mutated, mut_type, **kwargs: packing.mutation_packed(offsprings, mutated, self.length, mut_type, **kwargs)
+
+        for i in generations:
+            evaluations = self.evaluations
+
+            # Select all parents for reproduction
+            with profiler.phase("selection"):
+                parents1, parents2 = self.select_parents(select, tournament_k)
+
+            # Perform crossover to create offspring
+            with profiler.phase("crossover"):
+                if crossover_all is not None:
+                    # Cross all pairs at once, the parents of pairs without crossover are replicated
+                    crossed = self.rng.random(len(parents1)) < xo_prob
+                    offsprings1, offsprings2 = crossover_all(parents1, parents2, xo_type, crossed=crossed, rng=self.rng, **xo_kwargs)
+                else:
+                    offsprings1, offsprings2 = [], []
+                    for parent1, parent2 in zip(parents1, parents2):
+                        if random() < xo_prob:
+                            offspring1, offspring2 = crossover(parent1, parent2, xo_type, **xo_kwargs)
+                        else:
+                            # Replicate parents (copies, so that mutation does not change the parents)
+                            offspring1 = parent1.copy()
+                            offspring2 = parent2.copy()
+                        offsprings1.append(offspring1)
+                        offsprings2.append(offspring2)
+
+            # Perform mutation on offsprings
+            with profiler.phase("mutation"):
+                representations = np.concatenate((offsprings1, offsprings2))
+                mutated = self.rng.random(len(representations)) < mut_prob
+                if mutate_all is not None:
+                    # Mutate all selected offsprings at once
+                    mutate_all(representations, mutated, mut_type, bit_flips=bit_flips, rng=self.rng)
+                else:
+                    for row in np.flatnonzero(mutated):
+                        representations[row] = mutate(representations[row], mut_type, bit_flips=bit_flips)
+
+            # Replace duplicated offsprings, so that no evaluation and slot is spent on a genome twice
+            if dedup:
+                with profiler.phase("dedup"):
+                    profiler.count("duplicates", self.deduplicate(representations))
+
+            # Evaluate the whole new generation at once
+            with profiler.phase("evaluation"):
+                fitness, costs, totals = self.evaluate(representations)
+            profiler.count("offsprings", len(representations))
+            profiler.count("evaluations", self.evaluations - evaluations)
+
+            # Apply elitism by replacing the worst individuals of the new generation with the best individuals of the current generation
+            with profiler.phase("elitism"):
+                if elitism:
+                    elite, worst_new = elite_indices(self.fitness, fitness, elites, self.optim)
+                    representations[worst_new] = self.representations[elite]
+                    fitness[worst_new] = self.fitness[elite]
+                    costs[worst_new] = self.costs[elite]
+                    totals[worst_new] = self.totals[elite]
+
+                # Update the current generation with the new generation
+                self.set_representations(representations, fitness, costs, totals)
+
+            # Improve the best individuals (or all) by local search
+            self.improve(local_search, i, profiler)
+
+            # Store the fitness and other metrics of the best individual in each generation
+            with profiler.phase("history"):
+                best = self.best_index()
+                self.record_history(self.fitness[best], self.costs[best], self.totals[best])
+            profiler.end_generation(self)
+
+            # Save the state after every checkpoint_interval generations
+            if checkpoint is not None and (i + 1) % checkpoint_interval == 0:
+                self.save_checkpoint(checkpoint, i + 1)
+
+            # Stop early or re-seed a stagnating population
+            if termination is not None and termination.update(self, self.fitness[best]):
+                break
+            if restart is not None:
+                restart.update(self, self.fitness[best])
+
+        commodity_keys = self.commodity_names
+        for i, j in zip(self.unpacked(self.representations[[self.best_index()]])[0], commodity_keys):
+            if i == 1:
+                self.history_products.append(j)
@@ -0,0 +1,282 @@
+import numpy as np
+from data import nutrients, commodity_names, commodities_matrix
+from selection import roulette, ranked, tournament, batch_selection
+from variation import batch_crossover, batch_mutation
+
+
+def profile_matrix(profiles):
+    """This function converts constraint profiles into a matrix with one row per profile.
+
+    Args:
+        profiles (dict or list): Profiles by name (or a list of profiles). A profile is a dictionary with the same keys as
+            data.nutrients or a vector of the nutrient minimums in the same order.
+
+    Returns:
+        list: Names of the profiles (indices for a list)
+        np.ndarray: Constraint matrix (one row per profile)
+    """
+    if not isinstance(profiles, dict):
+        profiles = dict(enumerate(profiles))
+    rows = []
+    for profile in profiles.values():
+        if isinstance(profile, dict):
+            profile = [profile[name] for name in nutrients]
+        rows.append(np.asarray(profile, dtype=np.float64))
+    return list(profiles.keys()), np.array(rows)
+
+
+def roulette_profiles(fitness, n, rng):
+    """Roulette selection of n individuals of every profile at once (see selection.roulette_batch).
+
+    Args:
+        fitness (np.ndarray): Fitness of the individuals of every profile (one row per profile).
+        n (int): Number of individuals to select per profile.
+        rng (np.random.Generator): Random number generator.
+
+    Returns:
+        np.ndarray: Indices of the selected individuals (one row per profile)
+    """
+    profiles, size = fitness.shape
+    inverted = fitness.sum(axis=1, keepdims=True) - fitness
+    cumulative = np.cumsum(inverted, axis=1)
+    cumulative /= cumulative[:, -1:]
+    # Row q of the cumulative probabilities is shifted by q, so all rows are searched at once
+    offsets = np.arange(profiles)[:, None]
+    indices = np.searchsorted((cumulative + offsets).ravel(), (rng.random((profiles, n)) + offsets).ravel(), side="right")
+    return np.minimum(indices.reshape(profiles, n) - offsets * size, size - 1)
+
+
+def ranked_profiles(fitness, n, rng):
+    """Ranking selection of n individuals of every profile at once (see selection.ranked_batch)."""
+    profiles, size = fitness.shape
+    order = np.argsort(-fitness, axis=1, kind="stable")
+    cumulative = np.cumsum(np.arange(1, size + 1, dtype=np.float64))
+    ranks = np.searchsorted(cumulative, rng.random((profiles, n)) * cumulative[-1], side="right")
+    return np.take_along_axis(order, np.minimum(ranks, size - 1), axis=1)
+
+
+def tournament_profiles(fitness, n, rng, k):
+    """Tournament selection of n individuals of every profile at once (see selection.tournament_batch)."""
+    profiles, size = fitness.shape
+    participants = rng.choice(size, size=(profiles, n, k))
+    scores = np.take_along_axis(fitness, participants.reshape(profiles, n * k), axis=1).reshape(profiles, n, k)
+    winners = np.argmin(scores, axis=2)
+    return np.take_along_axis(participants, winners[:, :, None], axis=2)[:, :, 0]
+
+
+# Selection of all profiles at once, other selection functions with batch variants are applied profile by profile
+profile_selection = {
+    roulette: roulette_profiles,
+    ranked: ranked_profiles,
+    tournament: tournament_profiles,
+}
+
+
+def elite_matrix(fitness, new_fitness, k, optim="min"):
+    """Row by row version of selection.elite_indices for all profiles at once.
+
+    Args:
+        fitness (np.ndarray): Fitness values of the elite candidates of every profile (one row per profile).
+        new_fitness (np.ndarray): Fitness values of the new generation of every profile (one row per profile).
+        k (int): Number of elites.
+        optim (str, optional): "min" or "max". Defaults to "min".
+
+    Returns:
+        np.ndarray: Indices of the elites of every profile (best first)
+        np.ndarray: Indices of the replaced individuals of every profile
+        np.ndarray: True where the elite is better than the replaced individual
+    """
+    k = min(k, fitness.shape[1], new_fitness.shape[1])
+    # Lower scores are better
+    sign = -1 if optim == "max" else 1
+    scores, new_scores = sign * fitness, sign * new_fitness
+    elites = np.argpartition(scores, k - 1, axis=1)[:, :k]
+    elites = np.take_along_axis(elites, np.argsort(np.take_along_axis(scores, elites, axis=1), axis=1, kind="stable"), axis=1)
+    worst = np.argpartition(-new_scores, k - 1, axis=1)[:, :k]
+    worst = np.take_along_axis(worst, np.argsort(-np.take_along_axis(new_scores, worst, axis=1), axis=1, kind="stable"), axis=1)
+    better = np.take_along_axis(scores, elites, axis=1) < np.take_along_axis(new_scores, worst, axis=1)
+    return elites, worst, better
+
+
+class ProfileView:
+    """The population of one profile as seen by the batch selection functions."""
+    batch = True
+
+    def __init__(self, fitness, optim):
+        self.fitness = fitness
+        self.optim = optim
+
+    def __len__(self):
+        return len(self.fitness)
+
+
+class ProfilePopulation:
+    def __init__(self, size, profiles, optim="min", shared=True, rng=None, **kwargs):
+        """One batch population per constraint profile, evolved side by side. The genomes of all profiles are stacked in one
+        2-D array, and every generation is evaluated against all profiles with one call of get_fitness_profiles (one matrix
+        multiplication), which gives a profile x individual fitness matrix. With shared=True the elites of a profile are taken
+        from the genomes of all profiles, so good menus of one profile are reused by the others.
+
+        Args:
+            size (int): Size of the population of every profile.
+            profiles (dict or list): Constraint profiles (see profile_matrix).
+            optim (str, optional): "min" or "max". Defaults to "min".
+            shared (bool, optional): Take the elites of every profile from the genomes of all profiles. Defaults to True.
+            rng (np.random.Generator, optional): Random number generator. Defaults to the global numpy random state.
+            **kwargs: sol_size, valid_set and replacement as in Population, optionally commodity_names and commodities_matrix.
+        """
+        self.size = size
+        self.optim = optim
+        self.shared = shared
+        self.rng = np.random if rng is None else rng
+        self.length = kwargs["sol_size"]
+        self.commodity_names = kwargs.get("commodity_names", commodity_names)
+        self.commodities_matrix = kwargs.get("commodities_matrix", commodities_matrix)
+        self.names, self.profiles = profile_matrix(profiles)
+        # Number of representations evaluated by get_fitness_profiles
+        self.evaluations = 0
+        # Best fitness and costs of every profile in each generation (one row per generation)
+        self.history_fitness = np.empty((0, len(self.profiles)))
+        self.history_costs = np.empty((0, len(self.profiles)))
+        self.history_products = {}
+
+        # Random representations of all profiles, stacked profile by profile
+        if kwargs["replacement"] == True:
+            representations = self.rng.choice(kwargs["valid_set"], size=(len(self.profiles) * size, self.length))
+        elif kwargs["replacement"] == False:
+            representations = np.array([
+                self.rng.choice(kwargs["valid_set"], size=self.length, replace=False) for _ in range(len(self.profiles) * size)
+            ])
+        self.set_representations(representations)
+
+    def get_fitness_profiles(self, representations):
+        raise Exception("You need to monkey patch the profile fitness path.")
+
+    def set_representations(self, representations, fitness_matrix=None, costs=None, totals=None):
+        """This function replaces the stacked representations of all profiles and evaluates them if no fitness values are passed.
+
+        Args:
+            representations (np.ndarray): 2-D array with the representations of all profiles (size rows per profile).
+            fitness_matrix (np.ndarray, optional): Already computed fitness of every individual for every profile. Defaults to None.
+            costs (np.ndarray, optional): Already computed total costs. Defaults to None.
+            totals (np.ndarray, optional): Already computed total nutrition values. Defaults to None.
+        """
+        self.representations = np.ascontiguousarray(representations)
+        if fitness_matrix is None:
+            fitness_matrix, costs, totals = self.evaluate(self.representations)
+        self.fitness_matrix, self.costs, self.totals = fitness_matrix, costs, totals
+
+    def evaluate(self, representations):
+        """Evaluates all representations against all profiles with one call of get_fitness_profiles."""
+        self.evaluations += len(representations)
+        return self.get_fitness_profiles(representations)
+
+    def rows(self, q):
+        """Returns the rows of the population of profile q in the stacked arrays."""
+        return slice(q * self.size, (q + 1) * self.size)
+
+    def own_fitness(self, fitness_matrix):
+        """Returns the fitness of every individual for its own profile (one row per profile) from a fitness matrix."""
+        profiles = np.arange(len(self.profiles))
+        return fitness_matrix.reshape(len(profiles), len(profiles), self.size)[profiles, profiles]
+
+    @property
+    def fitness(self):
+        """Fitness of every individual for its own profile (one row per profile)."""
+        return self.own_fitness(self.fitness_matrix)
+
+    def best_indices(self):
+        """Returns the row of the best individual of every profile in the stacked arrays (from the genomes of all profiles if shared)."""
+        fitness = self.fitness_matrix if self.shared else self.fitness
+        best = np.argmax(fitness, axis=1) if self.optim == "max" else np.argmin(fitness, axis=1)
+        if self.shared:
+            return best
+        return best + np.arange(len(self.profiles)) * self.size
+
+    def evolve(self,
+            select=None,
+            tournament_k=None,
+            crossover=None,
+            mutate=None,
+            gens = 100,
+            mut_prob = 0.2,
+            mut_type = "single_bit_flip",
+            bit_flips = None,
+            xo_prob = 0.9,
+            xo_type = "one-point",
+            elitism = True,
+            elites = 1,
+            xo_points = None,
+    ):
+        """This function evolves the populations of all profiles over a defined number of generations. The parameters are the same
+        as in Population.evolve. Parents are selected per profile, crossover, mutation and evaluation are done for all profiles at once.
+        Only operators with batch variants are supported.
+        """
+        select_all = profile_selection.get(select)
+        select_batch = batch_selection.get(select)
+        crossover_all = batch_crossover.get(crossover)
+        mutate_all = batch_mutation.get(mutate)
+        if (select_all is None and select_batch is None) or crossover_all is None or mutate_all is None:
+            raise Exception("ProfilePopulation only supports selection, crossover and mutation functions with batch variants.")
+        select_kwargs = {} if tournament_k is None else {"k": tournament_k}
+        xo_kwargs = {} if xo_points is None else {"points": xo_points}
+        profiles = len(self.profiles)
+        pairs = (self.size + 1) // 2
+        # Offsets of the populations of the profiles in the stacked arrays
+        offsets = np.arange(profiles)[:, None] * self.size
+        history_fitness, history_costs = np.empty((gens, profiles)), np.empty((gens, profiles))
+
+        for i in range(gens):
+            # Select the parents of every profile by the fitness for that profile
+            fitness = self.fitness
+            if select_all is not None:
+                first = select_all(fitness, pairs, self.rng, **select_kwargs) + offsets
+                second = select_all(fitness, pairs, self.rng, **select_kwargs) + offsets
+            else:
+                views = [ProfileView(fitness[q], self.optim) for q in range(profiles)]
+                first = np.array([select_batch(view, pairs, rng=self.rng, **select_kwargs) for view in views]) + offsets
+                second = np.array([select_batch(view, pairs, rng=self.rng, **select_kwargs) for view in views]) + offsets
+            parents1, parents2 = self.representations[first.ravel()], self.representations[second.ravel()]
+
+            # Cross and mutate the offsprings of all profiles at once
+            crossed = self.rng.random(len(parents1)) < xo_prob
+            offsprings1, offsprings2 = crossover_all(parents1, parents2, xo_type, crossed=crossed, rng=self.rng, **xo_kwargs)
+            representations = np.concatenate((
+                offsprings1.reshape(profiles, pairs, self.length), offsprings2.reshape(profiles, pairs, self.length)
+            ), axis=1)[:, :self.size].reshape(profiles * self.size, self.length)
+            mutated = self.rng.random(len(representations)) < mut_prob
+            mutate_all(representations, mutated, mut_type, bit_flips=bit_flips, rng=self.rng)
+
+            # Evaluate the offsprings of all profiles against all profiles at once
+            fitness_matrix, costs, totals = self.evaluate(representations)
+
+            # Replace the worst offsprings of every profile by the elites of the profile
+            if elitism:
+                candidates = self.fitness_matrix if self.shared else self.fitness
+                elite, worst_new, better = elite_matrix(candidates, self.own_fitness(fitness_matrix), elites, self.optim)
+                elite, worst_new = (elite if self.shared else elite + offsets)[better], (worst_new + offsets)[better]
+                if len(elite):
+                    representations[worst_new] = self.representations[elite]
+                    fitness_matrix[:, worst_new] = self.fitness_matrix[:, elite]
+                    costs[worst_new] = self.costs[elite]
+                    totals[worst_new] = self.totals[elite]
+
+            # Update the current generation with the new generation
+            self.set_representations(representations, fitness_matrix, costs, totals)
+
+            # Store the best fitness of every profile in each generation (the same rows as the products, see best_indices)
+            best = self.best_indices()
+            history_fitness[i] = self.fitness_matrix[np.arange(profiles), best]
+            history_costs[i] = self.costs[best]
+
+        self.history_fitness = np.concatenate((self.history_fitness, history_fitness))
+        self.history_costs = np.concatenate((self.history_costs, history_costs))
+        self.history_products = {}
+        for name, row in zip(self.names, self.representations[self.best_indices()]):
+            self.history_products[name] = [item for selected, item in zip(row, self.commodity_names) if selected == 1]
+
+    def __len__(self):
+        return len(self.representations)
+
+    def __repr__(self):
+        return f"ProfilePopulation(profiles={len(self.profiles)}, size={self.size}); Best: {self.history_fitness[-1] if len(self.history_fitness) else None}"
@@ -0,0 +1,147 @@
+from collections import defaultdict
+from time import perf_counter
+
+
+# Phases of a generation in Population.evolve
+phases = ["selection", "crossover", "mutation", "dedup", "evaluation", "elitism", "local_search", "history"]
+
+
+class GenerationStats:
+    def __init__(self, generation, times, counts, best_fitness, mean_fitness):
+        """Statistics of one generation that are passed to the callbacks of a Profiler.
+
+        Args:
+            generation (int): Index of the generation.
+            times (dict): Seconds spent in every phase of the generation.
+            counts (dict): Counters of the generation (e.g. offsprings and fitness evaluations).
+            best_fitness (float): Fitness of the best individual after the generation.
+            mean_fitness (float): Mean fitness of the population after the generation.
+        """
+        self.generation = generation
+        self.times = times
+        self.counts = counts
+        self.best_fitness = best_fitness
+        self.mean_fitness = mean_fitness
+
+    @property
+    def duration(self):
+        return sum(self.times.values())
+
+    def __repr__(self):
+        return f"GenerationStats(generation={self.generation}); Time: {self.duration:.6f}s; Evaluations: {self.counts.get('evaluations', 0)}; Best: {self.best_fitness}"
+
+
+class Phase:
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = perf_counter()
+
+    def __exit__(self, *exc):
+        self.profiler.generation_times[self.name] += perf_counter() - self.start
+
+
+class Profiler:
+    def __init__(self, callbacks=None):
+        """Per-phase timers and counters of Population.evolve. Pass an instance as evolve(..., profiler=profiler).
+
+        Args:
+            callbacks (list, optional): Functions that are called with the GenerationStats of every generation. Defaults to None.
+        """
+        self.callbacks = list(callbacks or [])
+        self.times = defaultdict(float)
+        self.counts = defaultdict(int)
+        self.generations = []
+        self.generation_times = defaultdict(float)
+        self.generation_counts = defaultdict(int)
+        self.phase_timers = {}
+
+    def phase(self, name):
+        """Returns a context manager that adds the time spent in the block to the phase name."""
+        timer = self.phase_timers.get(name)
+        if timer is None:
+            timer = self.phase_timers[name] = Phase(self, name)
+        return timer
+
+    def count(self, name, n=1):
+        """Increases the counter name of the current generation by n."""
+        self.generation_counts[name] += n
+
+    def end_generation(self, population):
+        """Closes the current generation: adds its times and counters to the totals and calls the callbacks.
+
+        Args:
+            population (Population): Population after the generation.
+        """
+        fitness = population.fitness if population.batch else [individual.fitness for individual in population]
+        best = max(fitness) if population.optim == "max" else min(fitness)
+        stats = GenerationStats(
+            len(self.generations), dict(self.generation_times), dict(self.generation_counts), best, sum(fitness) / len(fitness)
+        )
+        for name, seconds in self.generation_times.items():
+            self.times[name] += seconds
+        for name, n in self.generation_counts.items():
+            self.counts[name] += n
+        self.generation_times.clear()
+        self.generation_counts.clear()
+        self.generations.append(stats)
+        for callback in self.callbacks:
+            callback(stats)
+
+    def report(self):
+        """Returns the total seconds per phase, the counters, the number of generations and the throughput."""
+        total = sum(self.times.values())
+        return {
+            "generations": len(self.generations),
+            "seconds": total,
+            "times": dict(self.times),
+            "counts": dict(self.counts),
+            "generations_per_second": len(self.generations) / total if total else 0.0,
+            "evaluations_per_second": self.counts.get("evaluations", 0) / total if total else 0.0,
+        }
+
+    def summary(self):
+        """Returns a printable table of the time spent in every phase."""
+        report = self.report()
+        lines = [f"{'Phase':<12}{'Total (s)':>12}{'Share':>9}{'Per gen (ms)':>15}"]
+        names = [name for name in phases if name in self.times] + [name for name in self.times if name not in phases]
+        for name in names:
+            seconds = self.times[name]
+            share = seconds / report["seconds"] if report["seconds"] else 0.0
+            per_generation = 1000 * seconds / max(len(self.generations), 1)
+            lines.append(f"{name:<12}{seconds:>12.4f}{share:>9.1%}{per_generation:>15.3f}")
+        lines.append(f"Generations: {report['generations']}; Generations/s: {report['generations_per_second']:.2f}")
+        for name, n in report["counts"].items():
+            lines.append(f"{name.capitalize()}: {n}")
+        lines.append(f"Evaluations/s: {report['evaluations_per_second']:.1f}")
+        return "\n".join(lines)
+
+    def __repr__(self):
+        return self.summary()
+
+
+class NullPhase:
+    def __enter__(self):
+        pass
+
+    def __exit__(self, *exc):
+        pass
+
+
+class NullProfiler:
+    """Profiler that does nothing, used by Population.evolve when profiling is disabled."""
+    null_phase = NullPhase()
+
+    def phase(self, name):
+        return self.null_phase
+
+    def count(self, name, n=1):
+        pass
+
+    def end_generation(self, population):
+        pass
+
+
+null_profiler = NullProfiler()
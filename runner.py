@@ -0,0 +1,187 @@
+from concurrent.futures import ProcessPoolExecutor
+import random
+import numpy as np
+from data import commodities
+from individual import Individual
+from population import Population
+from fitness import get_fitness, get_fitness_batch, get_flip_fitness
+
+
+class RunHistory:
+    def __init__(self, population):
+        """History of one evolved population (the attributes of Population that evaluation and the plots use).
+
+        Args:
+            population (Population): Evolved population.
+        """
+        self.history_fitness = list(population.history_fitness)
+        self.history_calories = list(population.history_calories)
+        self.history_protein = list(population.history_protein)
+        self.history_carbohydrates = list(population.history_carbohydrates)
+        self.history_fat = list(population.history_fat)
+        self.history_sodium = list(population.history_sodium)
+        # Total nutrition values of the best individuals (all nutrient columns of the menu)
+        self.history_totals = [list(totals) for totals in population.history["totals"]]
+        self.history_products = list(population.history_products)
+        # Prices of the products in the menu of the population (which need not be the menu of data.py)
+        index = {name: i for i, name in enumerate(population.commodity_names)}
+        self.product_prices = {product: float(population.commodities_matrix[index[product], 0]) for product in self.history_products}
+
+    @classmethod
+    def merge(cls, histories, optim="min"):
+        """This function merges the histories of populations that evolved side by side (e.g. islands).
+        For every generation the metrics of the best population are taken, the products are those of the best final population.
+        Histories of populations that stopped early (see termination.py) keep their last values for the remaining generations.
+
+        Args:
+            histories (list): RunHistory of every population.
+            optim (str, optional): "min" or "max". Defaults to "min".
+
+        Returns:
+            RunHistory: Merged history
+        """
+        merged = cls.__new__(cls)
+        gens = max(len(history.history_fitness) for history in histories)
+        # Pad shorter histories with their last value
+        padded = lambda values: list(values) + list(values[-1:]) * (gens - len(values))
+        fitness = np.array([padded(history.history_fitness) for history in histories])
+        best = np.argmax(fitness, axis=0) if optim == "max" else np.argmin(fitness, axis=0)
+        for name in ["history_fitness", "history_calories", "history_protein", "history_carbohydrates", "history_fat", "history_sodium",
+                     "history_totals"]:
+            setattr(merged, name, [padded(getattr(histories[b], name))[g] for g, b in enumerate(best)])
+        merged.history_products = list(histories[best[-1]].history_products)
+        merged.product_prices = dict(histories[best[-1]].product_prices)
+        return merged
+
+    def __repr__(self):
+        return f"RunHistory(gens={len(self.history_fitness)}); Fitness: {self.history_fitness[-1] if self.history_fitness else None}"
+
+
+def run_streams(seed_sequence):
+    """This function creates the random number streams of one run from its seed sequence.
+
+    Args:
+        seed_sequence (np.random.SeedSequence): Seed sequence of the run.
+
+    Returns:
+        np.random.Generator: numpy random number generator of the run
+        random.Random: Python random number generator of the run
+    """
+    python_seed = int(seed_sequence.generate_state(1, np.uint64)[0])
+    return np.random.default_rng(seed_sequence), random.Random(python_seed)
+
+
+def create_population(population_size, seed_sequence, population_kwargs=None, fitness=get_fitness, fitness_batch=get_fitness_batch):
+    """This function creates the initial population of one run. The run uses only its own random number streams: 
+    batch populations get the numpy generator of the run, and the global random and numpy random states 
+    (used by the single selection, crossover and mutation functions) are set from the run's streams.
+
+    Args:
+        population_size (int): Size of the population.
+        seed_sequence (np.random.SeedSequence): Seed sequence of the run.
+        population_kwargs (dict, optional): Additional keyword arguments of Population. Defaults to None.
+        fitness (function, optional): Fitness function that is monkey patched into Individual. Defaults to get_fitness.
+        fitness_batch (function, optional): Batch fitness function that is monkey patched into Population. Defaults to get_fitness_batch.
+
+    Returns:
+        Population: Initial population
+    """
+    kwargs = dict(sol_size=len(commodities), valid_set=list(range(2)), replacement=True)
+    kwargs.update(population_kwargs or {})
+    batch = kwargs.get("batch") or kwargs.get("packed")
+
+    # Monkey Patching (in the worker process)
+    Individual.get_fitness = fitness
+    if fitness is not get_fitness and fitness_batch is get_fitness_batch:
+        # The default batch path would replace a custom fitness function
+        if batch:
+            raise Exception("Batch populations with a custom fitness function need a matching fitness_batch.")
+        fitness_batch = Population.unpatched_fitness_batch
+    Population.get_fitness_batch = fitness_batch
+    # Neighbour scoring of the memetic local search (see memetic.py)
+    Population.get_flip_fitness = get_flip_fitness
+
+    # Set the global random states from the streams of the run
+    rng, random_state = run_streams(seed_sequence)
+    random.setstate(random_state.getstate())
+    np.random.seed(rng.integers(2**32, dtype=np.uint64))
+
+    if batch:
+        kwargs.setdefault("rng", rng)
+
+    # create initial population
+    return Population(size=population_size, optim="min", **kwargs)
+
+
+def run(population_size, evolve_parameters, seed_sequence, population_kwargs=None, fitness=get_fitness, fitness_batch=get_fitness_batch):
+    """This function creates and evolves one population. It is executed in the worker processes of evaluation.
+
+    Args:
+        population_size (int): Size of the population.
+        evolve_parameters (dict): Keyword arguments of Population.evolve.
+        seed_sequence (np.random.SeedSequence): Seed sequence of the run.
+        population_kwargs (dict, optional): Additional keyword arguments of Population. Defaults to None.
+        fitness (function, optional): Fitness function that is monkey patched into Individual. Defaults to get_fitness.
+        fitness_batch (function, optional): Batch fitness function that is monkey patched into Population. Defaults to get_fitness_batch.
+
+    Returns:
+        RunHistory: History of the evolved population
+    """
+    pop = create_population(population_size, seed_sequence, population_kwargs, fitness, fitness_batch)
+    pop.evolve(**evolve_parameters)
+    return RunHistory(pop)
+
+
+def evaluation(population_size, evolve_parameters, iterations=30, seed=None, workers=None, population_kwargs=None,
+               fitness=get_fitness, fitness_batch=get_fitness_batch, verbose=True):
+    """This function evolves independent populations (runs) in a process pool and summarizes the results the same way as
+    the evaluation function of the EvaluationNotebook. Every run gets its own random number streams spawned from the
+    master seed, so the results are identical for any number of workers (workers=1 runs serially in this process).
+
+    Args:
+        population_size (int): Size of the populations.
+        evolve_parameters (dict): Keyword arguments of Population.evolve.
+        iterations (int, optional): Number of runs. Defaults to 30.
+        seed (int, optional): Master seed of all runs. Defaults to None (random).
+        workers (int, optional): Number of worker processes. Defaults to the number of CPUs.
+        population_kwargs (dict, optional): Additional keyword arguments of Population (e.g. batch=True). Defaults to None.
+        fitness (function, optional): Fitness function that is monkey patched into Individual. Defaults to get_fitness.
+        fitness_batch (function, optional): Batch fitness function that is monkey patched into Population. Defaults to get_fitness_batch.
+        verbose (bool, optional): Print the mean and standard deviation of the best fitness values. Defaults to True.
+
+    Returns:
+        dict: Fitness history of every run
+        dict: Number of occurrences of every product in the best solutions
+        dict: Prices of the products of the best solution and their sum
+        RunHistory: History of the best run
+    """
+    # Independent seed sequences of all runs
+    seed_sequences = np.random.SeedSequence(seed).spawn(iterations)
+
+    if workers == 1:
+        runs = [run(population_size, evolve_parameters, seed_sequence, population_kwargs, fitness, fitness_batch) for seed_sequence in seed_sequences]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(run, population_size, evolve_parameters, seed_sequence, population_kwargs, fitness, fitness_batch)
+                for seed_sequence in seed_sequences
+            ]
+            runs = [future.result() for future in futures]
+
+    history = {i: r.history_fitness for i, r in enumerate(runs)}
+    items_combined = [product for r in runs for product in r.history_products]
+    product_count = {i: items_combined.count(i) for i in set(items_combined)}
+
+    # The runs can have different lengths if they are stopped early (see termination.py)
+    best_of_individuals = np.array([h[-1] for h in history.values()])
+    min_individual = int(np.argmin(best_of_individuals))
+    table = {}
+    for i in runs[min_individual].history_products:
+        table[i] = runs[min_individual].product_prices[i]
+    table['SUM'] = round(sum(table.values()), 4)
+
+    if verbose:
+        print(f'Average - Fitness: {round(np.mean(best_of_individuals),4)} USD$')
+        print(f'Standard Deviation - Fitness: {round(np.std(best_of_individuals),4)} USD$')
+
+    return history, product_count, table, runs[min_individual]
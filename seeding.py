@@ -0,0 +1,154 @@
+import numpy as np
+
+
+def construct(representations, commodities_matrix, constraints, alpha=0.0, rng=np.random):
+    """This function adds items to binary representations until all (min) constraints are met. In every step each
+    representation gets one item with a low price per covered nutrient deficit (deficits relative to the constraints):
+    the best item for alpha=0 (greedy) or a random item of the restricted candidate list for alpha>0 (GRASP).
+    All representations are constructed at once.
+
+    Args:
+        representations (np.ndarray): 2-D array with the binary start representations (one per row).
+        commodities_matrix (np.ndarray): Price followed by the nutrient values of every item (one row per item).
+        constraints (np.ndarray): Minimum of every nutrient value.
+        alpha (float, optional): Candidates are all items with a score up to best + alpha * (worst - best). Defaults to 0.0.
+        rng (np.random.Generator, optional): Random number generator (ties and candidates are chosen randomly). Defaults to np.random.
+
+    Returns:
+        np.ndarray: Constructed representations
+    """
+    representations = np.array(representations, dtype=np.int64)
+    prices, nutrition = commodities_matrix[:, 0], commodities_matrix[:, 1:]
+    totals = representations @ nutrition
+    scale = np.where(constraints > 0, constraints, 1)
+    rows = np.arange(len(representations))
+    for _ in range(representations.shape[1]):
+        # Representations that still break a constraint
+        deficits = np.maximum(constraints - totals[rows], 0)
+        broken = deficits.any(axis=1)
+        rows, deficits = rows[broken], deficits[broken]
+        if len(rows) == 0:
+            break
+
+        # Price per covered (relative) deficit of every item that is not selected yet
+        coverage = (np.minimum(nutrition[None, :, :], deficits[:, None, :]) / scale).sum(axis=2)
+        with np.errstate(divide="ignore"):
+            scores = np.where(coverage > 0, prices / coverage, np.inf)
+        scores[representations[rows] == 1] = np.inf
+        best = scores.min(axis=1)
+        # Representations without any helpful item left cannot be repaired
+        rows, scores, best = rows[np.isfinite(best)], scores[np.isfinite(best)], best[np.isfinite(best)]
+        if len(rows) == 0:
+            break
+        worst = np.where(np.isfinite(scores), scores, -np.inf).max(axis=1)
+
+        # Choose a random item of the restricted candidate list of every representation
+        candidates = scores <= (best + alpha * (worst - best))[:, None]
+        items = np.argmax(np.where(candidates, rng.random(scores.shape), -1), axis=1)
+        representations[rows, items] = 1
+        totals[rows] += nutrition[items]
+    return representations
+
+
+def trim(representations, commodities_matrix, constraints):
+    """This function removes redundant items (most expensive first) from binary representations that meet all
+    (min) constraints, as long as the constraints stay met.
+
+    Args:
+        representations (np.ndarray): 2-D array with binary representations (one per row).
+        commodities_matrix (np.ndarray): Price followed by the nutrient values of every item (one row per item).
+        constraints (np.ndarray): Minimum of every nutrient value.
+
+    Returns:
+        np.ndarray: Trimmed representations
+    """
+    representations = np.array(representations, dtype=np.int64)
+    nutrition = commodities_matrix[:, 1:]
+    totals = representations @ nutrition
+    feasible = np.all(constraints <= totals, axis=1)
+    for item in np.argsort(-commodities_matrix[:, 0], kind="stable"):
+        removable = feasible & (representations[:, item] == 1) & np.all(constraints <= totals - nutrition[item], axis=1)
+        representations[removable, item] = 0
+        totals[removable] -= nutrition[item]
+    return representations
+
+
+def greedy(n, commodities_matrix, constraints, rng=np.random):
+    """This function creates n greedy diets: the first from an empty menu, the others from a random first item, so that
+    the seeds differ. Redundant items are removed afterwards.
+
+    Args:
+        n (int): Number of diets.
+        commodities_matrix (np.ndarray): Price followed by the nutrient values of every item (one row per item).
+        constraints (np.ndarray): Minimum of every nutrient value.
+        rng (np.random.Generator, optional): Random number generator. Defaults to np.random.
+
+    Returns:
+        np.ndarray: 2-D array with the binary representations of the diets
+    """
+    representations = np.zeros((n, len(commodities_matrix)), dtype=np.int64)
+    if n > 1:
+        representations[np.arange(1, n), rng.choice(len(commodities_matrix), size=n - 1)] = 1
+    return trim(construct(representations, commodities_matrix, constraints, rng=rng), commodities_matrix, constraints)
+
+
+def grasp(n, commodities_matrix, constraints, alpha=0.2, rng=np.random):
+    """This function creates n diets with randomized greedy construction (GRASP) from an empty menu. Redundant items are removed afterwards.
+
+    Args:
+        n (int): Number of diets.
+        commodities_matrix (np.ndarray): Price followed by the nutrient values of every item (one row per item).
+        constraints (np.ndarray): Minimum of every nutrient value.
+        alpha (float, optional): Greediness of the construction (0 is greedy, 1 is random). Defaults to 0.2.
+        rng (np.random.Generator, optional): Random number generator. Defaults to np.random.
+
+    Returns:
+        np.ndarray: 2-D array with the binary representations of the diets
+    """
+    representations = np.zeros((n, len(commodities_matrix)), dtype=np.int64)
+    return trim(construct(representations, commodities_matrix, constraints, alpha, rng), commodities_matrix, constraints)
+
+
+def repair(representations, commodities_matrix, constraints, rng=np.random):
+    """This function repairs binary representations: the cheapest items (per covered deficit) are added until all (min)
+    constraints are met, then redundant items are removed.
+
+    Args:
+        representations (np.ndarray): 2-D array with binary representations (one per row).
+        commodities_matrix (np.ndarray): Price followed by the nutrient values of every item (one row per item).
+        constraints (np.ndarray): Minimum of every nutrient value.
+        rng (np.random.Generator, optional): Random number generator (ties are broken randomly). Defaults to np.random.
+
+    Returns:
+        np.ndarray: Repaired representations
+    """
+    return trim(construct(representations, commodities_matrix, constraints, rng=rng), commodities_matrix, constraints)
+
+
+# Seeding strategies of Population (seeding="greedy", "grasp" or "repair")
+strategies = ["greedy", "grasp", "repair"]
+
+
+def seeds(representations, strategy, ratio, commodities_matrix, constraints, alpha=0.2, rng=np.random):
+    """This function creates the heuristic seeds of an initial population. They replace the first ratio * n random representations.
+
+    Args:
+        representations (np.ndarray): 2-D array with the random (binary) representations of the population.
+        strategy (str): "greedy", "grasp" or "repair" (the random representations are repaired).
+        ratio (float): Share of seeds in the population.
+        commodities_matrix (np.ndarray): Price followed by the nutrient values of every item (one row per item).
+        constraints (np.ndarray): Minimum of every nutrient value.
+        alpha (float, optional): Greediness of GRASP. Defaults to 0.2.
+        rng (np.random.Generator, optional): Random number generator. Defaults to np.random.
+
+    Returns:
+        np.ndarray: 2-D array with the representations of the seeds (for the first rows of the population)
+    """
+    n = int(round(ratio * len(representations)))
+    if strategy == "greedy":
+        return greedy(n, commodities_matrix, constraints, rng)
+    elif strategy == "grasp":
+        return grasp(n, commodities_matrix, constraints, alpha, rng)
+    elif strategy == "repair":
+        return repair(representations[:n], commodities_matrix, constraints, rng)
+    raise Exception(f"Unknown seeding strategy {strategy}, use one of {strategies}.")
@@ -80,3 +80,128 @@ def tournament(pop,k):
     
     # Return the individual with the minimum fitness value in the tournament
     return min(tournament, key=attrgetter("fitness"))
+
+
+def fitness_array(pop):
+    """This function returns the fitness values of all individuals of the population as an array.
+
+    Args:
+        pop (Population): Current population object.
+
+    Returns:
+        np.ndarray: Fitness values
+    """
+    if getattr(pop, "batch", False):
+        return pop.fitness
+    return np.array([individual.fitness for individual in pop])
+
+
+def roulette_batch(pop, n, rng=None):
+    """Batch version of roulette. It computes the selection probabilities once and draws the indices of n selected 
+    individuals with one search in the cumulative probabilities.
+
+    Args:
+        pop (Population): Current population object.
+        n (int): Number of individuals to select.
+        rng (np.random.Generator, optional): Random number generator. Defaults to the global numpy random state.
+
+    Returns:
+        np.ndarray: Indices of the selected individuals
+    """
+    rng = np.random if rng is None else rng
+    fitness = fitness_array(pop)
+
+    # Invert the fitness values and calculate the cumulative selection probabilities
+    inverted_fitness = fitness.sum() - fitness
+    cumulative = np.cumsum(inverted_fitness / inverted_fitness.sum())
+
+    # Search the position of n random numbers in the cumulative probabilities
+    indices = np.searchsorted(cumulative, rng.random(n) * cumulative[-1], side="right")
+    return np.minimum(indices, len(fitness) - 1)
+
+
+def ranked_batch(pop, n, rng=None):
+    """Batch version of ranked. It sorts the population once and draws the indices of n selected individuals 
+    with one search in the cumulative rank probabilities.
+
+    Args:
+        pop (Population): Current population object.
+        n (int): Number of individuals to select.
+        rng (np.random.Generator, optional): Random number generator. Defaults to the global numpy random state.
+
+    Returns:
+        np.ndarray: Indices of the selected individuals
+    """
+    rng = np.random if rng is None else rng
+    fitness = fitness_array(pop)
+
+    # Sort the population based on fitness in descending order (stable, like sorted in ranked)
+    order = np.argsort(-fitness, kind="stable")
+
+    # Cumulative probability distribution based on the rank of each individual
+    cumulative = np.cumsum(np.arange(1, len(fitness) + 1, dtype=np.float64))
+
+    # Search the rank of n random numbers and map them back to the population
+    ranks = np.searchsorted(cumulative, rng.random(n) * cumulative[-1], side="right")
+    return order[np.minimum(ranks, len(fitness) - 1)]
+
+
+def tournament_batch(pop, n, k, rng=None):
+    """Batch version of tournament. It draws an (n x k) matrix of participants and returns the indices 
+    of the participants with the minimum fitness value in every row.
+
+    Args:
+        pop (Population): Current population object.
+        n (int): Number of individuals to select.
+        k (int): Size of the tournament.
+        rng (np.random.Generator, optional): Random number generator. Defaults to the global numpy random state.
+
+    Returns:
+        np.ndarray: Indices of the selected individuals
+    """
+    rng = np.random if rng is None else rng
+    fitness = fitness_array(pop)
+
+    # Randomly select k participants for each of the n tournaments
+    participants = rng.choice(len(fitness), size=(n, k))
+
+    # Return the participant with the minimum fitness value of each tournament
+    winners = np.argmin(fitness[participants], axis=1)
+    return participants[np.arange(n), winners]
+
+
+def elite_indices(fitness, new_fitness, k, optim="min"):
+    """This function finds the k best individuals of the current generation and the worst individuals of the new
+    generation they replace, with partial sorts of the fitness arrays. Elites only replace worse new individuals.
+
+    Args:
+        fitness (np.ndarray): Fitness values of the current generation.
+        new_fitness (np.ndarray): Fitness values of the new generation.
+        k (int): Number of elites.
+        optim (str, optional): "min" or "max". Defaults to "min".
+
+    Returns:
+        np.ndarray: Indices of the elites in the current generation (best first)
+        np.ndarray: Indices of the replaced individuals in the new generation
+    """
+    k = min(k, len(fitness), len(new_fitness))
+    if k <= 0:
+        return np.array([], dtype=np.intp), np.array([], dtype=np.intp)
+    # Lower scores are better
+    sign = -1 if optim == "max" else 1
+    scores, new_scores = sign * np.asarray(fitness), sign * np.asarray(new_fitness)
+    elites = np.argpartition(scores, k - 1)[:k]
+    elites = elites[np.argsort(scores[elites], kind="stable")]
+    worst = np.argpartition(-new_scores, k - 1)[:k]
+    worst = worst[np.argsort(-new_scores[worst], kind="stable")]
+    # The i-th best elite is compared with the i-th worst new individual, so the replaced pairs are a prefix
+    better = scores[elites] < new_scores[worst]
+    return elites[better], worst[better]
+
+
+# Batch variants that Population.evolve uses instead of the single selection functions
+batch_selection = {
+    roulette: roulette_batch,
+    ranked: ranked_batch,
+    tournament: tournament_batch,
+}
@@ -0,0 +1,172 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import product
+import json
+import math
+import os
+import numpy as np
+from fitness import get_fitness, get_fitness_batch
+from runner import run
+from selection import tournament
+
+
+def grid(base, **options):
+    """This function creates the evolve parameters of all combinations of the passed options.
+    Configurations without tournament selection get tournament_k=None.
+
+    Args:
+        base (dict): Evolve parameters that are the same for all configurations.
+        **options (list): Values of every varied evolve parameter, e.g. select=[roulette, ranked, tournament].
+
+    Returns:
+        list: Evolve parameters of every configuration
+    """
+    configurations = []
+    for values in product(*options.values()):
+        parameters = dict(base, **dict(zip(options.keys(), values)))
+        if parameters.get("select") is not tournament:
+            parameters["tournament_k"] = None
+        configurations.append(parameters)
+    return configurations
+
+
+def stable_value(name, value):
+    """Returns a representation of a parameter value that is the same in every session: the module and qualified name of a
+    function or the JSON of a plain value. Other objects (e.g. random number generators, caches or Termination) would change the key
+    between sessions, so resuming would silently recompute, and they raise an exception."""
+    if callable(value) and hasattr(value, "__name__"):
+        return f"{getattr(value, '__module__', None)}.{getattr(value, '__qualname__', value.__name__)}"
+    try:
+        return json.dumps(value, sort_keys=True)
+    except TypeError:
+        raise Exception(f"The value of {name} cannot be stored in the results of a sweep, use JSON-serializable values.")
+
+
+def config_key(parameters):
+    """Returns a readable, stable key of evolve parameters (functions are represented by their module and qualified names)."""
+    return ", ".join(f"{name}={stable_value(name, value)}" for name, value in sorted(parameters.items()))
+
+
+def load_results(path):
+    """This function loads the finished runs of a sweep from its results file (one JSON object per line).
+    A half-written last line (of an interrupted sweep) is cut off the file, so that new runs are appended after the last complete line.
+
+    Args:
+        path (str): Path of the results file.
+
+    Returns:
+        dict: Finished runs by (configuration key, run index)
+    """
+    results = {}
+    if path is not None and os.path.exists(path):
+        with open(path, "rb") as file:
+            complete, newline, rest = file.read().rpartition(b"\n")
+        records = [json.loads(line) for line in complete.split(b"\n") if line.strip()]
+        if rest.strip():
+            try:
+                records.append(json.loads(rest))
+                # Complete the last line, so that the next run starts a new line
+                with open(path, "ab") as file:
+                    file.write(b"\n")
+            except ValueError:
+                os.truncate(path, len(complete + newline))
+        for record in records:
+            results[(record["config"], record["run"])] = record
+    return results
+
+
+def rungs(min_runs, max_runs, eta):
+    """Returns the number of runs of every configuration in the rungs of successive halving."""
+    budgets = [min_runs]
+    while budgets[-1] < max_runs:
+        budgets.append(min(budgets[-1] * eta, max_runs))
+    return budgets
+
+
+def finish(results, path, key, i, history, setting):
+    """Stores a finished run in the results and appends it to the results file."""
+    record = {
+        "config": key,
+        "run": i,
+        "setting": setting,
+        "fitness": float(history.history_fitness[-1]),
+        "history_fitness": [float(value) for value in history.history_fitness],
+        "history_products": list(history.history_products),
+    }
+    results[(key, i)] = record
+    if path is not None:
+        with open(path, "a") as file:
+            file.write(json.dumps(record) + "\n")
+
+
+def sweep(configurations, population_size, path=None, min_runs=3, max_runs=30, eta=2, seed=None, workers=None,
+          population_kwargs=None, fitness=get_fitness, fitness_batch=get_fitness_batch):
+    """This function evaluates configurations of evolve parameters with successive halving. In every rung all remaining
+    configurations are evolved for the number of runs of the rung (runs of earlier rungs are reused), and only the best 1/eta
+    of the configurations (by mean final fitness) advance to the next rung with eta times more runs. All runs are scheduled
+    in a process pool, and every finished run is appended to the results file, so an interrupted sweep resumes without recomputing.
+    Run i of every configuration uses the same seed, so the configurations are compared on the same random streams.
+
+    Args:
+        configurations (list): Evolve parameters of every configuration (see grid).
+        population_size (int): Size of the populations.
+        path (str, optional): Results file (JSON lines). Defaults to None (no persistence).
+        min_runs (int, optional): Number of runs in the first rung. Defaults to 3.
+        max_runs (int, optional): Number of runs in the last rung. Defaults to 30.
+        eta (int, optional): Reduction factor of successive halving. Defaults to 2.
+        seed (int, optional): Master seed of the runs. Defaults to None (random, then resuming is not possible).
+        workers (int, optional): Number of worker processes (1 runs serially in this process). Defaults to the number of CPUs.
+        population_kwargs (dict, optional): Additional keyword arguments of Population. Defaults to None.
+        fitness (function, optional): Fitness function that is monkey patched into Individual. Defaults to get_fitness.
+        fitness_batch (function, optional): Batch fitness function that is monkey patched into Population. Defaults to get_fitness_batch.
+
+    Returns:
+        list: Summary of every configuration (key, parameters, runs, mean and standard deviation of the final fitness), best first
+    """
+    seed_sequences = np.random.SeedSequence(seed).spawn(max_runs)
+    keys = [config_key(parameters) for parameters in configurations]
+    if len(set(keys)) < len(keys):
+        raise Exception("Several configurations have the same key (e.g. lambdas or equal parameters), every configuration needs its own key.")
+    configurations = dict(zip(keys, configurations))
+    # Runs of the results file are only reused for the same population size and seed
+    setting = config_key({"population_size": population_size, "seed": seed, "population_kwargs": population_kwargs or {}})
+    results = {run_key: record for run_key, record in load_results(path).items() if record.get("setting") == setting}
+    remaining = list(configurations)
+
+    executor = None if workers == 1 else ProcessPoolExecutor(max_workers=workers)
+    try:
+        for budget in rungs(min_runs, max_runs, eta):
+            # Schedule the runs of the rung that are not finished yet
+            tasks = [(key, i) for key in remaining for i in range(budget) if (key, i) not in results]
+            if executor is None:
+                for key, i in tasks:
+                    finish(results, path, key, i, run(population_size, configurations[key], seed_sequences[i], population_kwargs, fitness, fitness_batch), setting)
+            else:
+                futures = {
+                    executor.submit(run, population_size, configurations[key], seed_sequences[i], population_kwargs, fitness, fitness_batch): (key, i)
+                    for key, i in tasks
+                }
+                for future in as_completed(futures):
+                    finish(results, path, *futures[future], future.result(), setting)
+
+            # Keep the best configurations
+            if budget < max_runs:
+                remaining.sort(key=lambda key: np.mean([results[(key, i)]["fitness"] for i in range(budget)]))
+                remaining = remaining[:max(1, math.ceil(len(remaining) / eta))]
+    finally:
+        if executor is not None:
+            # Runs that did not start yet are cancelled (e.g. on an interrupt), the finished ones are already stored
+            executor.shutdown(cancel_futures=True)
+
+    # Summarize every configuration with all of its finished runs
+    summary = []
+    for key, parameters in configurations.items():
+        final = [record["fitness"] for (k, i), record in sorted(results.items()) if k == key and i < max_runs]
+        summary.append({
+            "config": key,
+            "parameters": parameters,
+            "runs": len(final),
+            "mean": float(np.mean(final)),
+            "std": float(np.std(final)),
+        })
+    summary.sort(key=lambda entry: (-entry["runs"], entry["mean"]))
+    return summary
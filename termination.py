@@ -0,0 +1,135 @@
+from time import perf_counter
+
+
+def improves(fitness, best, optim, tolerance=0.0):
+    """Returns True if fitness is better than best by more than tolerance (best=None is always improved)."""
+    if best is None:
+        return True
+    if optim == "max":
+        return fitness > best + tolerance
+    elif optim == "min":
+        return fitness < best - tolerance
+
+
+# Diversity measures of Termination: "best" is the mean distance to the best individual (convergence to the incumbent,
+# Population.diversity), "hamming" the mean pairwise distance (spread of the population) and "unique" the share of distinct genomes
+diversity_measures = {
+    "best": lambda population: population.diversity(),
+    "hamming": lambda population: population.mean_hamming(),
+    "unique": lambda population: population.unique_count() / len(population),
+}
+
+
+class Termination:
+    def __init__(self, patience=None, tolerance=0.0, target=None, time_limit=None, max_evaluations=None, min_diversity=None,
+                 diversity="best"):
+        """Termination criteria of Population.evolve. Pass an instance as evolve(..., termination=termination), evolve stops
+        after the first generation that meets any of the enabled criteria (disabled criteria are None).
+
+        Args:
+            patience (int, optional): Stop after this number of generations without improvement of the best fitness. Defaults to None.
+            tolerance (float, optional): Minimum change of the best fitness that counts as improvement. Defaults to 0.0.
+            target (float, optional): Stop as soon as the best fitness reaches this value (e.g. a known optimal cost). Defaults to None.
+            time_limit (float, optional): Stop after this number of seconds since the start of evolve. Defaults to None.
+            max_evaluations (int, optional): Stop after this number of fitness evaluations since the start of evolve. Defaults to None.
+            min_diversity (float, optional): Stop when the diversity of the population falls below this value. Defaults to None.
+            diversity (str, optional): Diversity measure of min_diversity, "best", "hamming" or "unique" (see diversity_measures). Defaults to "best".
+        """
+        if diversity not in diversity_measures:
+            raise Exception(f"Unknown diversity measure {diversity}, use one of {list(diversity_measures)}.")
+        self.patience = patience
+        self.tolerance = tolerance
+        self.target = target
+        self.time_limit = time_limit
+        self.max_evaluations = max_evaluations
+        self.min_diversity = min_diversity
+        self.diversity = diversity
+        # Criterion that stopped the last evolve call and its generation (None if all generations were evolved)
+        self.reason = None
+        self.generation = None
+
+    def start(self, population):
+        """Resets the counters at the start of evolve."""
+        self.started = perf_counter()
+        self.evaluations = population.evaluations
+        self.best = None
+        self.stagnant = 0
+        self.reason = None
+        self.generation = None
+
+    def update(self, population, fitness):
+        """This function checks the criteria after a generation.
+
+        Args:
+            population (Population): Population after the generation.
+            fitness (float): Fitness of the best individual of the generation.
+
+        Returns:
+            bool: True if evolve should stop
+        """
+        if improves(fitness, self.best, population.optim, self.tolerance):
+            self.best = fitness
+            self.stagnant = 0
+        else:
+            self.stagnant += 1
+
+        if self.target is not None and not improves(self.target, fitness, population.optim):
+            self.reason = "target"
+        elif self.patience is not None and self.stagnant >= self.patience:
+            self.reason = "patience"
+        elif self.time_limit is not None and perf_counter() - self.started >= self.time_limit:
+            self.reason = "time_limit"
+        elif self.max_evaluations is not None and population.evaluations - self.evaluations >= self.max_evaluations:
+            self.reason = "max_evaluations"
+        elif self.min_diversity is not None and diversity_measures[self.diversity](population) < self.min_diversity:
+            self.reason = "min_diversity"
+        if self.reason is not None:
+            self.generation = population.generation
+            return True
+        return False
+
+    def __repr__(self):
+        return f"Termination(reason={self.reason}, generation={self.generation})"
+
+
+class Restart:
+    def __init__(self, patience=10, fraction=0.5, tolerance=0.0):
+        """Partial restart policy of Population.evolve. Pass an instance as evolve(..., restart=restart). After patience
+        generations without improvement the worst fraction of the population is replaced by new random individuals.
+
+        Args:
+            patience (int, optional): Number of generations without improvement that trigger a restart. Defaults to 10.
+            fraction (float, optional): Fraction of the population that is re-seeded. Defaults to 0.5.
+            tolerance (float, optional): Minimum change of the best fitness that counts as improvement. Defaults to 0.0.
+        """
+        self.patience = patience
+        self.fraction = fraction
+        self.tolerance = tolerance
+        # Generations of all restarts of the last evolve call
+        self.restarts = []
+
+    def start(self, population):
+        """Resets the counters at the start of evolve."""
+        self.best = None
+        self.stagnant = 0
+        self.restarts = []
+
+    def update(self, population, fitness):
+        """This function re-seeds the population after a generation if the search stagnates.
+
+        Args:
+            population (Population): Population after the generation.
+            fitness (float): Fitness of the best individual of the generation.
+        """
+        if improves(fitness, self.best, population.optim, self.tolerance):
+            self.best = fitness
+            self.stagnant = 0
+            return
+        self.stagnant += 1
+        if self.stagnant >= self.patience:
+            population.reseed(int(self.fraction * len(population)))
+            self.restarts.append(population.generation)
+            self.stagnant = 0
+
+    def __repr__(self):
+        return f"Restart(patience={self.patience}, fraction={self.fraction}); Restarts: {len(self.restarts)}"
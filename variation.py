@@ -1,62 +1,108 @@
 from data import nutrients, commodities
 import numpy as np
-from random import randint, sample
+from random import sample
 from individual import Individual
 
-def crossover(parent1, parent2, xo_type='one-point'):
+# Number of crossover points of the named k-point crossover types
+crossover_points = {
+    'one-point': 1,
+    'five-point': 5,
+    'ten-point': 10,
+}
+
+# Mutation methods of mutation and mutation_batch
+mutation_types = ["single_bit_flip", "complete_bit_flip", "single_swap_mutation", "multiple_bit_flip_mutation", "scramble_mutation"]
+
+
+def crossover(parent1, parent2, xo_type='one-point', points=None):
     """The function gets two parents, applies a crossover algorithm and returns the offsprings.
-    The function allows four different crossover types: uniform, one-point, five-point and ten-point crossover.
+    The function allows uniform crossover and k-point crossover with any number of points (one-point, five-point and ten-point 
+    crossover or xo_type='k-point' with the number of points passed as points).
 
     Args:
         parent1 (Individual): First individual for crossover.
         parent2 (Individual): Second individual for crossover.
         xo_type (str, optional): Crossover method that should be used. Defaults to "one-point".
+        points (int, optional): Number of crossover points if xo_type="k-point". Defaults to None.
 
     Returns:
-        Individual: First offspring
-        Individual: Second offspring
+        np.ndarray: First offspring
+        np.ndarray: Second offspring
     """
-    # Convert parents to lists
-    parent1 = list(parent1)
-    parent2 = list(parent2)
+    # Apply the batch crossover to a batch of one pair
+    offsprings1, offsprings2 = crossover_batch(np.array([parent1[:]]), np.array([parent2[:]]), xo_type, points=points)
+
+    # Return the resulting offspring
+    return offsprings1[0], offsprings2[0]
+
 
-    # uniform crossover
+def crossover_masks(n, length, xo_type='one-point', points=None, rng=None):
+    """The function creates the crossover masks of n pairs of parents. A True entry means that the first offspring 
+    takes the gene of the second parent (and the second offspring the gene of the first parent).
+
+    Args:
+        n (int): Number of pairs.
+        length (int): Length of the representations.
+        xo_type (str, optional): Crossover method that should be used. Defaults to "one-point".
+        points (int, optional): Number of crossover points if xo_type="k-point". Defaults to None.
+        rng (np.random.Generator, optional): Random number generator. Defaults to the global numpy random state.
+
+    Returns:
+        np.ndarray: Boolean mask with one row per pair
+    """
+    rng = np.random if rng is None else rng
+
+    # uniform crossover: every gene is taken from either parent with the same probability
     if xo_type == 'uniform':
-        # Generate random choices for each element in the parents
-        random_choices = np.random.randint(2, size=len(parent1))
-        # Create offspring using uniform crossover
-        offspring1 = np.where(random_choices, parent1, parent2)
-        offspring2 = np.where(random_choices, parent2, parent1)
-    # one-point crossover
-    elif xo_type == 'one-point':
-        # Select a random crossover point
-        point = randint(1, len(parent1)-1)
-        # Create offspring using one-point crossover
-        offspring1 = parent1[:point] + parent2[point:]
-        offspring2 = parent2[:point] + parent1[point:]
-    # five-point crossover
-    elif xo_type == 'five-point':
-        # Select five random crossover points
-        rl = np.array(sorted(sample(range(1, len(parent1)-1), 5)))
-        # Create offspring using five-point crossover
-        offspring1 = parent1[:rl[0]] + parent2[rl[0]:rl[1]] + parent1[rl[1]:rl[2]] + parent2[rl[2]:rl[3]] + parent1[rl[3]:rl[4]] + parent2[rl[4]:]
-        offspring2 = parent2[:rl[0]] + parent1[rl[0]:rl[1]] + parent2[rl[1]:rl[2]] + parent1[rl[2]:rl[3]] + parent2[rl[3]:rl[4]] + parent1[rl[4]:]
-    # ten-point crossover
-    elif xo_type == 'ten-point':
-        # Select ten random crossover points
-        rl = np.array(sorted(sample(range(1, len(parent1)-1), 10)))
-        # Create offspring using ten-point crossover
-        offspring1 = parent1[:rl[0]] + parent2[rl[0]:rl[1]] + parent1[rl[1]:rl[2]] + parent2[rl[2]:rl[3]] + parent1[rl[3]:rl[4]] + parent2[rl[4]:rl[5]] + parent1[rl[5]:rl[6]] + parent2[rl[6]:rl[7]] + parent1[rl[7]:rl[8]] + parent2[rl[8]:rl[9]] + parent1[rl[9]:]
-        offspring2 = parent2[:rl[0]] + parent1[rl[0]:rl[1]] + parent2[rl[1]:rl[2]] + parent1[rl[2]:rl[3]] + parent2[rl[3]:rl[4]] + parent1[rl[4]:rl[5]] + parent2[rl[5]:rl[6]] + parent1[rl[6]:rl[7]] + parent2[rl[7]:rl[8]] + parent1[rl[8]:rl[9]] + parent2[rl[9]:]
+        return rng.random((n, length)) < 0.5
 
-    # Return the resulting offspring
-    return offspring1, offspring2
+    # k-point crossover
+    if xo_type != 'k-point':
+        points = crossover_points[xo_type]
+    if not 0 < points < length:
+        raise ValueError(f"{points}-point crossover needs representations with more than {points} genes.")
+
+    # Draw k distinct crossover points from 1 to length-1 for every pair
+    cuts = np.argpartition(rng.random((n, length - 1)), points - 1, axis=1)[:, :points] + 1
+
+    # Every crossover point switches the parent, so the parity of the number of passed points is the mask
+    switches = np.zeros((n, length), dtype=np.int8)
+    switches[np.arange(n)[:, None], cuts] = 1
+    return (np.cumsum(switches, axis=1, dtype=np.int32) & 1).astype(bool)
+
+
+def crossover_batch(parents1, parents2, xo_type='one-point', points=None, crossed=None, rng=None):
+    """Batch version of crossover. The function gets two 2-D arrays of parents (one pair per row), builds the crossover 
+    masks of all pairs and creates all offsprings with np.where.
+
+    Args:
+        parents1 (np.ndarray): First parents (one representation per row).
+        parents2 (np.ndarray): Second parents (one representation per row).
+        xo_type (str, optional): Crossover method that should be used. Defaults to "one-point".
+        points (int, optional): Number of crossover points if xo_type="k-point". Defaults to None.
+        crossed (np.ndarray, optional): Boolean array, pairs with False are replicated instead of crossed. Defaults to None.
+        rng (np.random.Generator, optional): Random number generator. Defaults to the global numpy random state.
+
+    Returns:
+        np.ndarray: First offsprings
+        np.ndarray: Second offsprings
+    """
+    masks = crossover_masks(len(parents1), parents1.shape[1], xo_type, points=points, rng=rng)
+    if crossed is not None:
+        # Replicate the parents of the pairs without crossover
+        masks &= crossed[:, None]
+
+    # Create offspring using the crossover masks
+    offsprings1 = np.where(masks, parents2, parents1)
+    offsprings2 = np.where(masks, parents1, parents2)
+    return offsprings1, offsprings2
 
 
 def mutation(
         individual,
         mutation_type="single_bit_flip",
         bit_flips=None, 
+        return_changes=False,
     ):
     """The function gets one individual, applies a mutation algorithm and returns the mutated individual.
     The function allows five different mutation types: single bit flip, complete bit flip, single swap mutation, multiple bit flip and scramble mutation.
@@ -65,60 +111,152 @@ def mutation(
         individual (Individual): Individual for mutation.
         mutation_type (str, optional): Mutation method that should be used. Defaults to "single_bit_flip".
         bit_flips (int, optional): Number of bit flips if mutation_type="multiple_bit_flip_mutation". Defaults to None.
+        return_changes (bool, optional): Additionally return the touched indices and their values before the mutation. Defaults to False.
 
     Returns:
         Individual: Mutated individual
+        tuple: Touched indices and their previous values (only if return_changes=True)
     """
 
     # Single Bit Flip Mutation
     if mutation_type == "single_bit_flip":
         # randomly select index of the bit to be flipped
         mutation_point = np.random.randint(len(individual), size=1)[0]
+        indices, previous = [mutation_point], [individual[mutation_point]]
         # flip the bit
         if individual[mutation_point] == 1:
             individual[mutation_point] = 0
         elif individual[mutation_point] == 0:
             individual[mutation_point] = 1
-        return individual
 
     # Complete Bit Flip Mutation
     # Flips all bits in the individual
     elif mutation_type == "complete_bit_flip":
+        indices, previous = range(len(individual)), np.array(individual[:])
         for i in range(len(individual)):
             if individual[i] == 1:
                 individual[i] = 0
             elif individual[i] == 0:
                 individual[i] = 1
-        return individual
 
     # Swap Mutation (Single Bit)
     elif mutation_type == "single_swap_mutation":
         # get two indices of bits to be swaped
         mut_index = sample(range(len(individual)), 2)
+        indices, previous = mut_index, [individual[mut_index[0]], individual[mut_index[1]]]
         # swap bits
         individual[mut_index[0]], individual[mut_index[1]] = individual[mut_index[1]], individual[mut_index[0]]
-        return individual
 
     # Multiple Bit Flip Mutation
     # Flips a specified number of bits in the individual
     # The number of bit flips is determined by the 'bit_flips' parameter
     elif mutation_type == "multiple_bit_flip_mutation":
+        # values before the first flip of every touched bit (a bit can be flipped more than once)
+        touched = {}
         for _ in range(0,bit_flips):
             # randomly select index of the bit to be flipped
             mutation_point = np.random.randint(len(individual), size=1)[0]
+            touched.setdefault(mutation_point, individual[mutation_point])
             # flip bit
             if individual[mutation_point] == 1:
                 individual[mutation_point] = 0
             elif individual[mutation_point] == 0:
                 individual[mutation_point] = 1
-        return individual
+        indices, previous = list(touched.keys()), list(touched.values())
 
     # Scramble Mutation 
     elif mutation_type == "scramble_mutation":
         # randomly select indices that define the range of bits to be shuffled
         split_point_1 = np.random.randint(len(individual), size=1)[0]
         split_point_2 = np.random.randint(low=int(split_point_1), high=len(individual), size=1)[0]
+        indices, previous = range(split_point_1, split_point_2), np.array(individual[split_point_1:split_point_2])
         # shuffle bits in the specified range
         sublist = np.random.permutation(individual[split_point_1:split_point_2])
         individual[split_point_1:split_point_2] = sublist
-        return individual
\ No newline at end of file
+
+    if return_changes:
+        return individual, (np.array(indices, dtype=np.intp), np.array(previous))
+    return individual
+
+
+def flippable(genes):
+    """Returns the XOR mask of bit flips: 1 for genes that are 0 or 1, 0 for all other values."""
+    return ((genes == 0) | (genes == 1)).astype(genes.dtype)
+
+
+def mutation_batch(
+        offsprings,
+        mutated,
+        mutation_type="single_bit_flip",
+        bit_flips=None,
+        rng=None,
+    ):
+    """Batch version of mutation. The function gets the 2-D array of offsprings (one representation per row) and a boolean array 
+    that marks the rows to mutate, and applies the mutation algorithm to all marked rows at once (in place).
+    Bit flips are applied as XOR masks to the genes that are 0 or 1 (other values are kept, as in mutation).
+
+    Args:
+        offsprings (np.ndarray): Offsprings for mutation (one representation per row).
+        mutated (np.ndarray): Boolean array, only rows with True are mutated.
+        mutation_type (str, optional): Mutation method that should be used. Defaults to "single_bit_flip".
+        bit_flips (int, optional): Number of bit flips if mutation_type="multiple_bit_flip_mutation". Defaults to None.
+        rng (np.random.Generator, optional): Random number generator. Defaults to the global numpy random state.
+
+    Returns:
+        np.ndarray: Mutated offsprings
+    """
+    rng = np.random if rng is None else rng
+    rows = np.flatnonzero(mutated)
+    n, length = len(rows), offsprings.shape[1]
+    if n == 0:
+        return offsprings
+
+    # Single Bit Flip Mutation
+    if mutation_type == "single_bit_flip":
+        # randomly select the index of the bit to be flipped in every row
+        mutation_points = rng.choice(length, size=n)
+        offsprings[rows, mutation_points] ^= flippable(offsprings[rows, mutation_points])
+
+    # Complete Bit Flip Mutation
+    # Flips all bits of the mutated rows
+    elif mutation_type == "complete_bit_flip":
+        offsprings[rows] ^= flippable(offsprings[rows])
+
+    # Swap Mutation (Single Bit)
+    elif mutation_type == "single_swap_mutation":
+        # get two different indices of bits to be swaped in every row
+        first = rng.choice(length, size=n)
+        second = (first + 1 + rng.choice(length - 1, size=n)) % length
+        # swap bits
+        offsprings[rows, first], offsprings[rows, second] = offsprings[rows, second], offsprings[rows, first]
+
+    # Multiple Bit Flip Mutation
+    # Flips a specified number of bits in every mutated row (a bit drawn twice is flipped back, as in mutation)
+    elif mutation_type == "multiple_bit_flip_mutation":
+        mutation_points = rng.choice(length, size=(n, bit_flips))
+        indices = (np.repeat(rows, bit_flips), mutation_points.ravel())
+        # flipped bits stay binary, so the mask of the genes before the flips is valid for all flips
+        np.bitwise_xor.at(offsprings, indices, flippable(offsprings[indices]))
+
+    # Scramble Mutation 
+    elif mutation_type == "scramble_mutation":
+        # randomly select indices that define the range of bits to be shuffled in every row
+        split_points_1 = rng.choice(length, size=n)
+        split_points_2 = split_points_1 + (rng.random(n) * (length - split_points_1)).astype(np.intp)
+        # genes inside the range get random sort keys within the range, all other genes keep their position
+        positions = np.arange(length)
+        inside = (positions >= split_points_1[:, None]) & (positions < split_points_2[:, None])
+        keys = split_points_1[:, None] + rng.random((n, length)) * (split_points_2 - split_points_1)[:, None]
+        order = np.argsort(np.where(inside, keys, positions), axis=1)
+        offsprings[rows] = np.take_along_axis(offsprings[rows], order, axis=1)
+
+    return offsprings
+
+
+# Batch variants that Population.evolve uses for batch populations
+batch_crossover = {
+    crossover: crossover_batch,
+}
+batch_mutation = {
+    mutation: mutation_batch,
+}